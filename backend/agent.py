@@ -1,21 +1,92 @@
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, List, Dict
-from langchain_openai import ChatOpenAI
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from typing import TypedDict, List, Dict, Optional, Callable, TYPE_CHECKING
+from contextlib import AsyncExitStack
+from contextvars import ContextVar
+import asyncio
 import os
+import threading
+import time
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
-from tools import search_web, search_multiple_queries, scrape_url, search_academic
+from tools import (search_web, search_multiple_queries, scrape_url, search_academic_multiple, search_local, index_documents,
+                   fetch_pdf_text, warm_connections)
 from pydantic import BaseModel, Field
+from utils.cancellation import bind_cancel_event, unbind_cancel_event, check_cancelled
+from config import (CHECKPOINT_DB, LOCAL_MIN_RESULTS, LLM_API_BASE, PLAN_CACHE_THRESHOLD, PLAN_CACHE_SIZE, PLAN_CACHE_TTL,
+                    PDF_FULLTEXT, ANALYSIS_FULLTEXT_CHARS)
+from utils.plan_cache import PlanCache
+from utils.metrics import JobMetrics, bind_job_metrics, unbind_job_metrics, span, annotate
+from utils.tracing import JobTrace, bind_job_trace, unbind_job_trace
+from utils.joblog import JobLog, bind_job_log, unbind_job_log, current_log, log_stage
+
+if TYPE_CHECKING:
+    from langchain_core.caches import BaseCache
+    from langchain_openai import ChatOpenAI
 
 load_dotenv()
 
-# OpenRouter setup
-llm = ChatOpenAI(
-    model="moonshotai/kimi-k2-instruct-0905",  # or "meta-llama/llama-3.1-70b-instruct"
-    openai_api_key=os.getenv("GROQ_API_KEY"),
-    openai_api_base="https://api.groq.com/openai/v1",
-    temperature=0.7,
-    max_tokens=4000
-)
+DEFAULT_MODEL = "moonshotai/kimi-k2-instruct-0905"  # or "meta-llama/llama-3.1-70b-instruct"
+
+
+def build_llm(model: str = DEFAULT_MODEL) -> "ChatOpenAI":
+    """Create a chat client for the given model on the Groq endpoint"""
+    from langchain_openai import ChatOpenAI  # Heavy import (openai SDK), deferred to first use
+    
+    return ChatOpenAI(
+        model=model,
+        openai_api_key=os.getenv("GROQ_API_KEY"),
+        openai_api_base=LLM_API_BASE,
+        temperature=0.7,
+        max_tokens=4000
+    )
+
+
+# Default chat client, built on first use (or by warm_up at startup)
+_llm = None
+
+
+def get_llm() -> "ChatOpenAI":
+    global _llm
+    if _llm is None:
+        _llm = build_llm()
+    return _llm
+
+
+# LLM response cache of the current run, if any (batch runs bind one; API jobs don't)
+_llm_cache: ContextVar[Optional["BaseCache"]] = ContextVar("llm_cache", default=None)
+
+
+def run_llm(model: Optional[str] = None) -> "ChatOpenAI":
+    """Chat client for a node: the shared default (or `model`), with the run's cache attached"""
+    client = build_llm(model) if model else get_llm()
+    cache = _llm_cache.get()
+    # model_copy shares the underlying HTTP clients
+    return client if cache is None else client.model_copy(update={"cache": cache})
+
+# Plans of recent queries, looked up by similarity before calling the planner
+plan_cache = PlanCache(threshold=PLAN_CACHE_THRESHOLD, maxsize=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL)
+
+
+async def invoke_llm(name: str, runnable, prompt: str):
+    """
+    Call a chat model (or a structured-output runnable built with include_raw=True)
+    inside an instrumentation span that records token usage
+    
+    Returns:
+        The parsed object for structured output, otherwise the AIMessage
+    """
+    with span("llm", name):
+        result = await runnable.ainvoke(prompt)
+        raw = result["raw"] if isinstance(result, dict) else result
+        usage = getattr(raw, "usage_metadata", None) or {}
+        annotate(tokens_in=usage.get("input_tokens", 0), tokens_out=usage.get("output_tokens", 0))
+    
+    if isinstance(result, dict):
+        if result.get("parsing_error"):
+            raise result["parsing_error"]
+        return result["parsed"]
+    return result
 
 # --- Pydantic Models for Structured Output ---
 
@@ -45,35 +116,51 @@ class AgentState(TypedDict):
     query: str                      # Original user query
     research_plan: List[str]        # Sub-questions to research
     search_results: Dict[str, List[Dict]]  # Results organized by sub-question
-    key_findings: List[KeyFinding]  # Extracted insights (structured)
+    key_findings: List[Dict]        # Extracted insights (KeyFinding.model_dump(), plain dicts so checkpoints need no custom types)
     report: str                     # Final report
     current_step: str               # For progress tracking
-    logs: List[str]                 # Stream of thought logs
     loop_count: int                 # To prevent infinite loops
     
     # --- Phase 3: Academic Filters ---
-    search_mode: str                # 'web' or 'academic'
+    search_mode: str                # 'web', 'academic', 'local' or 'hybrid'
     min_citations: int              # Filter for academic papers
     open_access: bool               # Filter for open access
+    
+    # --- Checkpointing ---
+    report_model: Optional[str]     # Override the writer model (report re-runs)
 
 
 
-def plan_research(state: AgentState) -> AgentState:
+async def plan_research(state: AgentState) -> AgentState:
     """
     Agent 1: Research Planner
     Breaks down complex query into specific sub-questions
     """
+    check_cancelled()
     print("\n🎯 AGENT 1: Planning research...")
     
-    # Initialize logs if not present
-    logs = state.get('logs', [])
+    logs = current_log()
     logs.append(f"🤖 Planner: Analyzing query '{state['query']}'...")
     
-    # Use structured output to guarantee a list of strings
-    planner = llm.with_structured_output(ResearchPlan)
-    
     mode = state.get('search_mode', 'web')
     
+    # Skip the LLM call if a similar query was planned recently
+    cached = plan_cache.lookup(state['query'], mode)
+    if cached is not None:
+        research_plan = cached['plan']
+        print(f"♻️ Reusing plan of '{cached['query']}' (similarity {cached['similarity']:.2f})")
+        if cached['substitutions']:
+            logs.append(f"✏️ Adapted plan: {', '.join(f'{a} → {b}' for a, b in cached['substitutions'].items())}")
+        logs.append(f"♻️ Reused plan from similar query '{cached['query']}' ({len(research_plan)} steps).")
+        return {
+            **state,
+            "research_plan": research_plan,
+            "current_step": "Research plan created"
+        }
+    
+    # Use structured output to guarantee a list of strings
+    planner = run_llm().with_structured_output(ResearchPlan, include_raw=True)
+    
     if mode == 'academic':
         # --- Academic Prompt (Keywords) ---
         prompt = f"""You are an expert academic research planner.
@@ -109,8 +196,9 @@ Output: ["React enterprise adoption statistics 2024", "Vue.js enterprise use cas
 """
 
     try:
-        plan_result = planner.invoke(prompt)
+        plan_result = await invoke_llm("planner", planner, prompt)
         research_plan = plan_result.items
+        plan_cache.add(state['query'], mode, research_plan)
     except Exception as e:
         print(f"⚠️ Failed to generate plan gracefully: {e}")
         # Fallback
@@ -124,21 +212,71 @@ Output: ["React enterprise adoption statistics 2024", "Vue.js enterprise use cas
     for i, q in enumerate(research_plan, 1):
         print(f"  {i}. {q}")
     
+    logs.append(f"📋 Plan created with {len(research_plan)} steps.")
     return {
         **state,
         "research_plan": research_plan,
-        "current_step": "Research plan created",
-        "logs": logs + [f"📋 Plan created with {len(research_plan)} steps."]
+        "current_step": "Research plan created"
     }
 
 
-def gather_information(state: AgentState) -> AgentState:
+async def _search_and_scrape(queries: List[str], logs: JobLog) -> Dict[str, List[Dict]]:
+    """Tavily search plus a deep scrape of the top result per query"""
+    search_results = await asyncio.to_thread(search_multiple_queries, queries, logs=logs)
+    
+    # Deep Scrape (Top 1 result per query) - ONLY for Web Mode (Academic abstracts are usually enough)
+    print("  📖 Deep scraping top results...")
+    for query, results in search_results.items():
+        if results:
+            top_result = results[0]  # Take the best one
+            print(f"  - Scraping: {top_result['title']}")
+            content = await asyncio.to_thread(scrape_url, top_result['url'], logs=logs)
+            if content:
+                top_result['content'] = f"[FULL CONTENT] {content}"
+            else:
+                top_result['content'] = f"[Snippey] {top_result['content']}"
+    return search_results
+
+
+async def _fetch_full_text(search_results: Dict[str, List[Dict]], logs: JobLog) -> None:
+    """Append open-access PDF text to the top paper (with a PDF) of each query, in place"""
+    papers = {}
+    for results in search_results.values():
+        top = next((r for r in results if r.get('pdf_url')), None)
+        if top is not None:
+            papers.setdefault(top['pdf_url'], []).append(top)
+    if not papers:
+        return
+    
+    logs.append(f"📄 Reading {len(papers)} open-access PDFs...")
+    urls = list(papers)
+    texts = await asyncio.gather(*(asyncio.to_thread(fetch_pdf_text, url, logs=logs) for url in urls))
+    for url, text in zip(urls, texts):
+        if text:
+            for paper in papers[url]:
+                paper['content'] = f"{paper['content']}\n[FULL TEXT] {text}"
+
+
+def _source_excerpt(content: str) -> str:
+    """Prompt text for one source: its first 500 chars, plus a budgeted slice of any attached PDF text"""
+    head, marker, full_text = content.partition("\n[FULL TEXT] ")
+    excerpt = f"{head[:500]}..."
+    if marker and ANALYSIS_FULLTEXT_CHARS > 0:
+        excerpt += f"{marker}{full_text[:ANALYSIS_FULLTEXT_CHARS]}..."
+    return excerpt
+
+
+async def gather_information(state: AgentState) -> AgentState:
     """
     Agent 2: Information Gatherer
     Searches the web AND scrapes deep content for top results
+    
+    Local/hybrid modes read the persistent document index first; anything
+    fetched over the network is added back to it.
     """
+    check_cancelled()
     print("\n🔍 AGENT 2: Gathering information...")
-    logs = state.get('logs', [])
+    logs = current_log()
     logs.append("🕵️‍♀️ Gatherer: Starting information retrieval...")
     
     # 1. Choose Search Strategy
@@ -147,58 +285,72 @@ def gather_information(state: AgentState) -> AgentState:
     
     research_plan = state['research_plan']
     search_results = {}
+    fetched = {}  # Results that came from the network (to be indexed)
     
     if mode == 'academic':
         # --- Academic Mode (Semantic Scholar) ---
         print("  🎓 Running Academic Search...")
         logs.append(f"🎓 Mode: Academic. Querying Semantic Scholar...")
+        results = await asyncio.to_thread(
+            search_academic_multiple,
+            research_plan,
+            min_citations=state.get('min_citations', 0),
+            open_access=state.get('open_access', False),
+            logs=logs
+        )
+        search_results = {query: papers for query, papers in results.items() if papers}
+        if PDF_FULLTEXT:
+            await _fetch_full_text(search_results, logs)
+        fetched = search_results
+    
+    elif mode in ('local', 'hybrid'):
+        # --- Local / Hybrid Mode (document index, then Tavily for gaps) ---
+        logs.append(f"📚 Mode: {mode.capitalize()}. Checking local index...")
+        missing = []
         for query in research_plan:
-            logs.append(f"🔎 Citing: {query}...")
-            results = search_academic(
-                query, 
-                min_citations=state.get('min_citations', 0),
-                open_access=state.get('open_access', False),
-                logs=logs
-            )
+            results = await asyncio.to_thread(search_local, query, logs=logs)
             if results:
                 search_results[query] = results
+            if len(results) < LOCAL_MIN_RESULTS:
+                missing.append(query)
+        
+        if mode == 'hybrid' and missing:
+            logs.append(f"🌍 {len(missing)} questions not covered locally. Searching Tavily...")
+            fetched = await _search_and_scrape(missing, logs)
+            for query, results in fetched.items():
+                if results:
+                    search_results[query] = results
                 
     else:
         # --- Web Mode (Tavily) ---
         logs.append(f"🌍 Mode: Web. Searching Tavily...")
-        search_results = search_multiple_queries(research_plan, logs=logs)
-        
-        # 2. Deep Scrape (Top 1 result per query) - ONLY for Web Mode (Academic abstracts are usually enough)
-        print("  📖 Deep scraping top results...")
-        for query, results in search_results.items():
-            if results:
-                top_result = results[0]  # Take the best one
-                print(f"  - Scraping: {top_result['title']}")
-                content = scrape_url(top_result['url'], logs=logs)
-                if content:
-                    top_result['content'] = f"[FULL CONTENT] {content}"
-                else:
-                    top_result['content'] = f"[Snippey] {top_result['content']}"
+        search_results = await _search_and_scrape(research_plan, logs)
+        fetched = search_results
+    
+    if fetched:
+        source = 'academic' if mode == 'academic' else 'web'
+        await asyncio.to_thread(index_documents, fetched, source, logs=logs)
     
     # Count total results
     total_results = sum(len(results) for results in search_results.values())
     print(f"✓ Gathered {total_results} sources across {len(search_results)} queries")
     
+    logs.append(f"✅ Found {total_results} sources.")
     return {
         **state,
         "search_results": search_results,
-        "current_step": f"Gathered {total_results} sources",
-        "logs": logs + [f"✅ Found {total_results} sources."]
+        "current_step": f"Gathered {total_results} sources"
     }
 
 
-def analyze_information(state: AgentState) -> AgentState:
+async def analyze_information(state: AgentState) -> AgentState:
     """
     Agent 3: Information Analyzer
     Extracts key insights from search results
     """
+    check_cancelled()
     print("\n🧠 AGENT 3: Analyzing information...")
-    logs = state.get('logs', [])
+    logs = current_log()
     logs.append("🧠 Analyst: Reading and extracting insights...")
     
     # Combine all search results
@@ -221,19 +373,19 @@ def analyze_information(state: AgentState) -> AgentState:
                     details="No relevant sources found to analyze.", 
                     source_title="System", 
                     source_url="#"
-                )
+                ).model_dump()
             ],
             "current_step": "Analysis complete (no data)"
         }
     
     # Create prompt with all sources
     sources_text = "\n\n".join([
-        f"Query: {s['query']}\nTitle: {s['title']}\nURL: {s['url']}\nContent: {s['content'][:500]}..."
+        f"Query: {s['query']}\nTitle: {s['title']}\nURL: {s['url']}\nContent: {_source_excerpt(s['content'])}"
         for s in all_sources[:10]  # Limit to top 10 sources to save tokens
     ])
     
     # Use structured output
-    analyzer = llm.with_structured_output(ResearchInsights)
+    analyzer = run_llm().with_structured_output(ResearchInsights, include_raw=True)
     
     prompt = f"""You are analyzing search results to answer: "{state['query']}"
     
@@ -253,8 +405,8 @@ def analyze_information(state: AgentState) -> AgentState:
     """
 
     try:
-        result = analyzer.invoke(prompt)
-        key_findings = result.findings
+        result = await invoke_llm("analyzer", analyzer, prompt)
+        key_findings = [f.model_dump() for f in result.findings]
         
         # Handle looping
         if result.further_research_needed and state.get('loop_count', 0) < 3:
@@ -268,12 +420,12 @@ def analyze_information(state: AgentState) -> AgentState:
                 "current_step": "Looping back for more info"
             }
         else:
+            logs.append(f"💡 Analysis complete. Found {len(key_findings)} insights.")
             return {
                 **state,
                 "key_findings": key_findings,
                 "loop_count": state.get("loop_count", 0),  # Keep same
-                "current_step": "Analysis complete",
-                "logs": logs + [f"💡 Analysis complete. Found {len(key_findings)} insights."]
+                "current_step": "Analysis complete"
             }
             
     except Exception as e:
@@ -285,7 +437,7 @@ def analyze_information(state: AgentState) -> AgentState:
                 details=f"Could not analyze results due to error: {str(e)}", 
                 source_title="System", 
                 source_url="#"
-            )
+            ).model_dump()
         ]
     
     print(f"✓ Extracted {len(key_findings)} key findings")
@@ -306,13 +458,14 @@ def should_continue(state: AgentState) -> str:
     return "report"
 
 
-def generate_report(state: AgentState) -> AgentState:
+async def generate_report(state: AgentState) -> AgentState:
     """
     Agent 4: Report Generator
     Creates comprehensive report from findings
     """
+    check_cancelled()
     print("\n✍️ AGENT 4: Generating report...")
-    logs = state.get('logs', [])
+    logs = current_log()
     logs.append("✍️ Writer: Compiling final report...")
     
     # Prepare all sources for citation
@@ -326,8 +479,8 @@ def generate_report(state: AgentState) -> AgentState:
     ])
     
     findings_text = "\n".join([
-        f"• {f.topic}: {f.details} (Source: {f.source_title})"
-        for f in state['key_findings']
+        f"• {f['topic']}: {f['details']} (Source: {f['source_title']})"
+        for f in map(dict, state['key_findings'])  # dict() also reads KeyFinding objects from older checkpoints
     ])
     
     prompt = f"""You are an academic research assistant. 
@@ -358,7 +511,8 @@ def generate_report(state: AgentState) -> AgentState:
     - DO NOT wrap the entire report in a code block (no ``` at the beginning or end)
     Write ONLY the report content, starting directly with # Executive Summary:"""
 
-    response = llm.invoke(prompt)
+    writer = run_llm(state.get('report_model'))
+    response = await invoke_llm("writer", writer, prompt)
     raw_report = response.content.strip()
     
     # Extra safety: strip any outer code blocks if the model ignores instructions
@@ -382,18 +536,44 @@ def generate_report(state: AgentState) -> AgentState:
     }
 
 
+# Per-run node callback, bound by run_agent like the cancel event and metrics:
+# on_node(name, "start", input_state) before a node, on_node(name, "end", result) after it
+NodeHook = Callable[[str, str, dict], None]
+_node_hook: ContextVar[Optional[NodeHook]] = ContextVar("node_hook", default=None)
+
+
+def _with_span(name: str, node):
+    """Wrap a node so its whole run is recorded as a 'node' span (and reported to on_node)"""
+    async def run(state: AgentState) -> AgentState:
+        hook = _node_hook.get()
+        with span("node", name), log_stage(name):
+            if hook is not None:
+                hook(name, "start", state)
+            result = await node(state)
+            if hook is not None:
+                hook(name, "end", result)
+            return result
+    run.__name__ = name
+    return run
+
+
 # Build the workflow
-def create_workflow():
-    """Create the LangGraph workflow"""
+def create_workflow(checkpointer=None):
+    """
+    Create the LangGraph workflow
+    
+    Args:
+        checkpointer: Optional LangGraph saver. When set, state is persisted
+            after every node so a failed run can resume from the last one.
+    """
     workflow = StateGraph(AgentState)
     
     # Add nodes (agents)
-    workflow.add_node("plan", plan_research)
-    workflow.add_node("gather", gather_information)
-    workflow.add_node("analyze", analyze_information)
-    workflow.add_node("report", generate_report)
+    workflow.add_node("plan", _with_span("plan", plan_research))
+    workflow.add_node("gather", _with_span("gather", gather_information))
+    workflow.add_node("analyze", _with_span("analyze", analyze_information))
+    workflow.add_node("report", _with_span("report", generate_report))
     
-    # Define edges (flow)
     # Define edges (flow)
     workflow.set_entry_point("plan")
     workflow.add_edge("plan", "gather")
@@ -411,20 +591,237 @@ def create_workflow():
     
     workflow.add_edge("report", END)
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+
+async def warm_up() -> dict:
+    """
+    Get the process ready for its first job: build the LLM client, open the
+    shared checkpointer with the graph every job reuses, and open pooled
+    connections to the LLM and search hosts
+    
+    Returns:
+        Seconds per step. Connection entries hold an error message instead when
+        a host could not be reached (jobs will simply connect on demand).
+    """
+    timings = {}
+    
+    started = time.perf_counter()
+    client = get_llm()
+    timings["llm_client_s"] = round(time.perf_counter() - started, 3)
+    
+    started = time.perf_counter()
+    get_graph()
+    await open_checkpointer()
+    timings["graph_compile_s"] = round(time.perf_counter() - started, 3)
+    
+    async def llm_connection():
+        started = time.perf_counter()
+        try:
+            # Cheap authenticated GET that leaves a warm connection in the client's pool
+            await client.root_async_client.models.list()
+            return round(time.perf_counter() - started, 3)
+        except Exception as e:
+            return f"error: {e}"
+    
+    llm_host, search_hosts = await asyncio.gather(llm_connection(), asyncio.to_thread(warm_connections))
+    timings["connections_s"] = {urlsplit(LLM_API_BASE).netloc: llm_host, **search_hosts}
+    return timings
+
+
+# Steps after which the analyze node has finished for good
+ANALYSIS_DONE_STEPS = ("Analysis complete", "Analysis complete (no data)", "Report complete")
+
+
+# Last use of each checkpoint thread, kept next to LangGraph's own tables
+THREAD_ACTIVITY_DDL = "CREATE TABLE IF NOT EXISTS thread_activity (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+
+
+# Compiled once per process and shared by every run (LangGraph graphs are reentrant)
+_graph = None
+# Long-lived saver plus the graph compiled with it: {"stack", "saver", "graph"}
+_checkpointer: Optional[dict] = None
+
+
+def get_graph():
+    """The shared graph for runs without a checkpoint thread"""
+    global _graph
+    if _graph is None:
+        _graph = create_workflow()
+    return _graph
+
+
+async def open_checkpointer() -> tuple[AsyncSqliteSaver, object]:
+    """
+    The shared checkpointer and the graph compiled with it
+    
+    Opened by warm_up (or the first checkpointed run) and kept for the life of
+    the process. The saver is tied to the event loop that opened it, so a new
+    loop (e.g. a second asyncio.run in a script) gets a fresh connection.
+    
+    Returns:
+        (saver, graph)
+    """
+    global _checkpointer
+    loop = asyncio.get_running_loop()
+    current = _checkpointer
+    if current is not None and current["saver"].loop is loop:
+        return current["saver"], current["graph"]
+    
+    stack = AsyncExitStack()
+    saver = await stack.enter_async_context(AsyncSqliteSaver.from_conn_string(CHECKPOINT_DB))
+    await saver.setup()
+    async with saver.lock:
+        await saver.conn.execute(THREAD_ACTIVITY_DDL)
+        await saver.conn.commit()
+    
+    opened = _checkpointer
+    if opened is not current and opened is not None and opened["saver"].loop is loop:
+        # Another run opened one while we were connecting
+        await stack.aclose()
+        return opened["saver"], opened["graph"]
+    
+    _checkpointer = {"stack": stack, "saver": saver, "graph": create_workflow(checkpointer=saver)}
+    if current is not None:
+        try:
+            await current["stack"].aclose()
+        except Exception as e:
+            print(f"⚠️ Failed to close previous checkpointer: {e}")
+    return saver, _checkpointer["graph"]
+
+
+async def close_checkpointer() -> None:
+    """Close the shared checkpointer (app shutdown)"""
+    global _checkpointer
+    current, _checkpointer = _checkpointer, None
+    if current is not None:
+        await current["stack"].aclose()
+
+
+async def _touch_thread(saver, thread_id: str) -> None:
+    """Record when a checkpoint thread was last used (see prune_checkpoints)"""
+    async with saver.lock:
+        await saver.conn.execute(
+            "INSERT INTO thread_activity (thread_id, updated_at) VALUES (?, ?) "
+            "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (thread_id, time.time())
+        )
+        await saver.conn.commit()
+
+
+async def prune_checkpoints(max_age_s: float) -> int:
+    """
+    Delete checkpoint threads that have not been used for max_age_s seconds
+    
+    Threads written before activity was tracked are adopted with the current
+    time, so they expire one period later.
+    
+    Returns:
+        Number of threads deleted
+    """
+    saver, _ = await open_checkpointer()
+    now = time.time()
+    conn = saver.conn
+    async with saver.lock:
+        await conn.execute(
+            "INSERT OR IGNORE INTO thread_activity (thread_id, updated_at) "
+            "SELECT DISTINCT thread_id, ? FROM checkpoints", (now,)
+        )
+        cursor = await conn.execute(
+            "SELECT thread_id FROM thread_activity WHERE updated_at < ?",
+            (now - max_age_s,)
+        )
+        expired = [row[0] for row in await cursor.fetchall()]
+        await conn.commit()
+    for thread_id in expired:
+        await saver.adelete_thread(thread_id)  # Takes the saver lock itself
+        async with saver.lock:
+            await conn.execute("DELETE FROM thread_activity WHERE thread_id = ?", (thread_id,))
+            await conn.commit()
+    return len(expired)
+
+
+async def load_checkpoint(thread_id: str) -> Optional[dict]:
+    """Latest stored state of a checkpoint thread, or None if there is none"""
+    _, graph = await open_checkpointer()
+    snapshot = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+    return snapshot.values or None
+
+
+async def _invoke_with_checkpoint(initial_state: dict, thread_id: str, report_model: Optional[str]) -> dict:
+    """
+    Run the workflow on a checkpointed thread
+
+    - No checkpoint yet: start from initial_state.
+    - Unfinished checkpoint (crash, failed LLM call, cancel): resume from the last completed node.
+    - report_model set and analysis done: re-run only `report` on the stored state.
+    - Finished checkpoint: return the stored state without any external calls.
+    """
+    saver, agent = await open_checkpointer()
+    await _touch_thread(saver, thread_id)
+    try:
+        return await _run_thread(agent, initial_state, thread_id, report_model)
+    finally:
+        # Retention counts from the last time the thread was used
+        await _touch_thread(saver, thread_id)
+
+
+async def _run_thread(agent, initial_state: dict, thread_id: str, report_model: Optional[str]) -> dict:
+    """Body of _invoke_with_checkpoint, run on the shared checkpointed graph"""
+    config = {"configurable": {"thread_id": thread_id}}
+    snapshot = await agent.aget_state(config)
+
+    if not snapshot.values:
+        return await agent.ainvoke(initial_state, config)
+
+    if report_model and snapshot.values.get("current_step") in ANALYSIS_DONE_STEPS:
+        print(f"♻️ Re-running report for thread {thread_id[:8]}... with {report_model}")
+        # Pretend analyze just finished so the conditional edge routes to `report`
+        await agent.aupdate_state(
+            config,
+            {"report_model": report_model, "current_step": "Analysis complete"},
+            as_node="analyze"
+        )
+        return await agent.ainvoke(None, config)
+
+    if snapshot.next:
+        print(f"♻️ Resuming thread {thread_id[:8]}... at {', '.join(snapshot.next)}")
+        if report_model:
+            await agent.aupdate_state(config, {"report_model": report_model})
+        return await agent.ainvoke(None, config)
+
+    print(f"♻️ Thread {thread_id[:8]}... already complete, using stored state")
+    return snapshot.values
 
 
 # Main function to run the agent
-async def run_agent(query: str, search_mode: str = "web", min_citations: int = 0, open_access: bool = False) -> dict:
+async def run_agent(query: str, search_mode: str = "web", min_citations: int = 0, open_access: bool = False,
+                    cancel_event: Optional[threading.Event] = None, thread_id: Optional[str] = None,
+                    report_model: Optional[str] = None, metrics: Optional[JobMetrics] = None,
+                    trace: Optional[JobTrace] = None, log: Optional[JobLog] = None,
+                    on_node: Optional[NodeHook] = None, llm_cache: Optional["BaseCache"] = None) -> dict:
     """
     Run the complete research workflow
+    
+    Args:
+        cancel_event: Set it to abort the run. Nodes and tools check it between
+            blocking steps and raise JobCancelled.
+        thread_id: Checkpoint thread. When given, state is saved to SQLite after
+            each node and calling again with the same id resumes the run.
+        report_model: Model to write the report with. Together with thread_id,
+            re-runs only `report` on top of the stored gather/analyze state.
+        metrics: Collects per-node and per-call timings, bytes, tokens, retries
+            and cache hits for this run.
+        trace: Records a timeline of every node and tool call (Chrome trace format).
+        log: Ring buffer the nodes and tools write progress lines to.
+        on_node: Called as on_node(name, "start", state) / on_node(name, "end", result)
+            around every node of this run (e.g. to publish progress).
+        llm_cache: LangChain cache for this run's LLM calls only (not process-wide).
     """
     print(f"\n{'='*60}")
     print(f"🚀 Starting research for: {query} [Mode: {search_mode}]")
     print(f"{'='*60}")
     
-    agent = create_workflow()
-    
     initial_state = {
         "query": query,
         "research_plan": [],
@@ -432,15 +829,34 @@ async def run_agent(query: str, search_mode: str = "web", min_citations: int = 0
         "key_findings": [],
         "report": "",
         "current_step": "Starting",
-        "logs": ["🚀 System initialized."],
         "loop_count": 0,
         "search_mode": search_mode,
         "min_citations": min_citations,
-        "open_access": open_access
+        "open_access": open_access,
+        "report_model": report_model
     }
     
     # Run the workflow
-    result = await agent.ainvoke(initial_state)
+    token = bind_cancel_event(cancel_event)
+    metrics_token = bind_job_metrics(metrics)
+    trace_token = bind_job_trace(trace)
+    log_token = bind_job_log(log if log is not None else JobLog())
+    hook_token = _node_hook.set(on_node)
+    cache_token = _llm_cache.set(llm_cache)
+    try:
+        if thread_id:
+            result = await _invoke_with_checkpoint(initial_state, thread_id, report_model)
+        else:
+            result = await get_graph().ainvoke(initial_state)
+    finally:
+        _llm_cache.reset(cache_token)
+        _node_hook.reset(hook_token)
+        unbind_job_log(log_token)
+        unbind_job_trace(trace_token)
+        unbind_job_metrics(metrics_token)
+        if trace is not None:
+            trace.finish()
+        unbind_cancel_event(token)
     
     # Prepare sources for frontend
     all_sources = []
@@ -0,0 +1,201 @@
+"""
+Batch research runner
+
+Runs many queries through run_agent with bounded concurrency. All items share
+the process-wide search/scrape caches (tools.py) and a bounded LLM cache that
+only this batch's runs use, so overlapping sub-questions across the batch only hit the network once.
+
+Input is JSONL, one query per line:
+    {"id": "q1", "query": "...", "search_mode": "web", "min_citations": 0, "open_access": false}
+A bare JSON string is also accepted. `id` defaults to the line number.
+
+Results are appended to the output JSONL as each item finishes. Re-running with
+the same output file skips items already written (resume).
+
+Usage:
+    python batch.py queries.jsonl -o results.jsonl -c 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Optional
+
+from langchain_core.caches import InMemoryCache
+
+from agent import run_agent
+from config import BATCH_LLM_CACHE_SIZE
+from tools import search_cache, scrape_cache
+
+
+def load_queries(path: str) -> list[dict]:
+    """
+    Read a JSONL file of queries
+
+    Returns:
+        List of items with id, query, search_mode, min_citations, open_access
+    """
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            raw = json.loads(line)
+            if isinstance(raw, str):
+                raw = {"query": raw}
+            items.append({
+                "id": str(raw.get("id", line_no)),
+                "query": raw["query"],
+                "search_mode": raw.get("search_mode", "web"),
+                "min_citations": raw.get("min_citations", 0),
+                "open_access": raw.get("open_access", False),
+            })
+    return items
+
+
+def load_completed_ids(path: str) -> set[str]:
+    """Ids already written to the output file (successful items only)"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial line from a crash
+            if record.get("status") == "completed":
+                done.add(str(record.get("id")))
+    return done
+
+
+def _to_json(obj):
+    # KeyFinding and other pydantic models in the result
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = 4,
+    batch_id: Optional[str] = None,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Run every query in input_path and append results to output_path
+
+    Args:
+        input_path: JSONL file of queries
+        output_path: JSONL file to append results to (also used to resume)
+        concurrency: Max number of agents running at once
+        batch_id: Prefix for checkpoint threads, so a crashed item resumes
+            from its last node. Defaults to the output file name.
+        on_progress: Called with the current stats after every item
+
+    Returns:
+        Throughput statistics for this run
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    items = load_queries(input_path)
+    completed_ids = load_completed_ids(output_path)
+    pending = [item for item in items if item["id"] not in completed_ids]
+    batch_id = batch_id or os.path.splitext(os.path.basename(output_path))[0]
+
+    # Share LLM responses across this batch only (identical prompts are answered once).
+    # Bounded, and attached to the batch's own runs rather than set process-wide.
+    llm_cache = InMemoryCache(maxsize=BATCH_LLM_CACHE_SIZE)
+
+    print(f"📦 Batch {batch_id}: {len(items)} queries, {len(completed_ids)} already done, concurrency={concurrency}")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    write_lock = asyncio.Lock()
+    latencies: list[float] = []
+    stats = {
+        "batch_id": batch_id,
+        "total": len(items),
+        "skipped": len(items) - len(pending),
+        "completed": 0,
+        "failed": 0,
+    }
+    started = time.perf_counter()
+
+    def snapshot() -> dict:
+        elapsed = time.perf_counter() - started
+        finished = stats["completed"] + stats["failed"]
+        return {
+            **stats,
+            "elapsed_s": round(elapsed, 2),
+            "jobs_per_min": round(finished / elapsed * 60, 2) if elapsed > 0 else 0.0,
+            "latency_p50_s": round(_percentile(latencies, 50), 2),
+            "latency_p95_s": round(_percentile(latencies, 95), 2),
+            "search_cache": search_cache.stats(),
+            "scrape_cache": scrape_cache.stats(),
+        }
+
+    async def run_item(item: dict):
+        async with semaphore:
+            item_started = time.perf_counter()
+            try:
+                result = await run_agent(
+                    item["query"],
+                    item["search_mode"],
+                    item["min_citations"],
+                    item["open_access"],
+                    thread_id=f"{batch_id}:{item['id']}",
+                    llm_cache=llm_cache,
+                )
+                record = {"id": item["id"], "status": "completed", **result}
+                stats["completed"] += 1
+            except Exception as e:
+                record = {"id": item["id"], "status": "error", "query": item["query"], "error": str(e)}
+                stats["failed"] += 1
+                print(f"❌ Batch item {item['id']} failed: {e}")
+            latencies.append(time.perf_counter() - item_started)
+
+            line = json.dumps(record, default=_to_json, ensure_ascii=False)
+            async with write_lock:
+                with open(output_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+            if on_progress is not None:
+                on_progress(snapshot())
+
+    await asyncio.gather(*(run_item(item) for item in pending))
+
+    final = snapshot()
+    print(f"📦 Batch {batch_id} done: {final['completed']} ok, {final['failed']} failed, "
+          f"{final['jobs_per_min']} jobs/min, p50 {final['latency_p50_s']}s, p95 {final['latency_p95_s']}s")
+    return final
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a batch of InsightFlow research queries")
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to append results to")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Max concurrent agents")
+    parser.add_argument("--batch-id", default=None, help="Checkpoint prefix (defaults to output file name)")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    stats = asyncio.run(run_batch(args.input, args.output, args.concurrency, args.batch_id))
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
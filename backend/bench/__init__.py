@@ -0,0 +1,3 @@
+"""
+Offline benchmark harness: stub upstreams (stubs.py) and the driver (run.py)
+"""
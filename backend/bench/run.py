@@ -0,0 +1,353 @@
+"""
+Offline end-to-end benchmark
+
+Starts the stub upstreams (bench/stubs.py), points the backend at them and
+runs N research jobs at a fixed concurrency, either straight through
+run_agent, through the FastAPI app (POST /api/research + status polling),
+or both. Reports per-stage and per-upstream p50/p95/p99, jobs/minute and
+peak RSS, and can save the result as a baseline or compare against one.
+
+Usage (from backend/):
+    python -m bench.run --jobs 40 --concurrency 8 --save bench/baseline.json
+    python -m bench.run --jobs 40 --concurrency 8 --compare bench/baseline.json
+    python -m bench.run --target api --llm-latency 300 --tavily-rate-limit 0.05
+
+Caches, the plan cache and the local index are disabled unless --caches is
+given, so runs measure the uncached path and stay comparable. Peak RSS covers
+the whole process, stub server included.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+
+from bench.stubs import StubServer, ROUTES
+
+STAGES = ("plan", "gather", "analyze", "report")
+
+TOPICS = (
+    "remote work productivity", "electric vehicle adoption", "microservices migration",
+    "AI tutoring outcomes", "solar panel efficiency", "supply chain resilience",
+    "open source licensing", "quantum computing readiness", "urban heat islands",
+    "telehealth usage", "battery recycling", "edge computing latency",
+)
+
+
+def summarize(samples: list[float]) -> dict:
+    """Count and p50/p95/p99/max in milliseconds"""
+    if not samples:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    values = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def make_queries(n: int) -> list[str]:
+    return [f"{TOPICS[i % len(TOPICS)]} trends {2015 + i // len(TOPICS)}" for i in range(n)]
+
+
+def upstream_report(stubs: StubServer) -> dict:
+    return {
+        route: {**summarize(stubs.samples[route]), "status": {str(k): v for k, v in stubs.status_counts[route].items()}}
+        for route in ROUTES
+    }
+
+
+def jobs_report(latencies: list[float], failed: int, elapsed: float) -> dict:
+    finished = len(latencies) + failed
+    return {
+        "completed": len(latencies),
+        "failed": failed,
+        "elapsed_s": round(elapsed, 2),
+        "jobs_per_min": round(finished / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "e2e": summarize(latencies),
+    }
+
+
+async def bench_agent(queries: list[str], concurrency: int, search_mode: str) -> dict:
+    """Drive run_agent directly, timing every node"""
+    import agent
+
+    stage_samples: dict[str, list[float]] = {stage: [] for stage in STAGES}
+
+    def node_timer():
+        """on_node hook for one run: records the duration of every node"""
+        started: dict[str, float] = {}
+
+        def on_node(name: str, event: str, state: dict):
+            if event == "start":
+                started[name] = time.perf_counter()
+            else:
+                stage_samples[name].append(time.perf_counter() - started.pop(name))
+        return on_node
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    failed = 0
+
+    async def one(query: str):
+        nonlocal failed
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await agent.run_agent(query, search_mode, on_node=node_timer())
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                failed += 1
+                print(f"❌ Bench job failed: {e}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "jobs": jobs_report(latencies, failed, elapsed),
+        "stages": {stage: summarize(samples) for stage, samples in stage_samples.items()},
+    }
+
+
+async def _start_api_server():
+    # Served on the benchmark's own loop, so async clients shared with the
+    # agent benchmark are never used across event loops
+    import requests
+    import uvicorn
+    import main
+
+    config = uvicorn.Config(main.app, host="127.0.0.1", port=0, log_level="warning")
+    server = uvicorn.Server(config)
+    started = time.perf_counter()
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    listening = time.perf_counter() - started
+    port = server.servers[0].sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    
+    # Wait for the warm-up to finish (/api/health turns 200)
+    while True:
+        health = await asyncio.to_thread(requests.get, f"{base_url}/api/health", timeout=5)
+        if health.status_code == 200 or health.json().get("warmup_error"):
+            break
+        await asyncio.sleep(0.01)
+    startup = {
+        "listen_s": round(listening, 3),
+        "ready_s": round(time.perf_counter() - started, 3),
+        "warmup": health.json().get("warmup"),
+    }
+    return server, task, base_url, startup
+
+
+async def bench_api(queries: list[str], concurrency: int, search_mode: str, poll_interval: float) -> dict:
+    """
+    Drive the FastAPI app over HTTP the way the frontend does
+
+    Stage timings come from each finished job's `metrics` (its node.* spans),
+    summed per job when a stage runs more than once (gather/analyze loops).
+    """
+    import requests
+
+    server, task, base_url, startup = await _start_api_server()
+    session = requests.Session()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    stage_samples: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    failed = 0
+
+    def run_job(query: str) -> dict:
+        job_id = session.post(f"{base_url}/api/research", json={"query": query, "search_mode": search_mode}).json()["job_id"]
+        logs_since = 0
+        while True:
+            payload = session.get(f"{base_url}/api/status/{job_id}", params={"logs_since": logs_since}).json()
+            if payload["status"] != "processing":
+                return payload
+            logs_since = payload["logs_total"]
+            time.sleep(poll_interval)
+
+    async def one(query: str):
+        nonlocal failed
+        async with semaphore:
+            started = time.perf_counter()
+            payload = await asyncio.to_thread(run_job, query)
+            if payload["status"] == "completed":
+                latencies.append(time.perf_counter() - started)
+                spans = (payload.get("metrics") or {}).get("spans", {})
+                for stage in STAGES:
+                    if f"node.{stage}" in spans:
+                        stage_samples[stage].append(spans[f"node.{stage}"]["total_s"])
+            else:
+                failed += 1
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(q) for q in queries))
+    finally:
+        server.should_exit = True
+        await task
+    elapsed = time.perf_counter() - started
+
+    # Startup numbers are only cold with --target api (agent already imported otherwise)
+    return {
+        "startup": startup,
+        "jobs": jobs_report(latencies, failed, elapsed),
+        "stages": {stage: summarize(samples) for stage, samples in stage_samples.items()},
+    }
+
+
+# --- Baseline comparison ---
+
+def _flatten(data: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            if key not in ("meta", "status"):
+                flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Print metric deltas against a baseline
+
+    Returns:
+        Names of metrics that regressed by more than `tolerance`
+        (latency/RSS up, throughput down)
+    """
+    cur, base = _flatten(current), _flatten(baseline)
+    regressions = []
+    print(f"\n{'metric':<44}{'baseline':>12}{'current':>12}{'delta':>10}")
+    for name in sorted(cur.keys() & base.keys()):
+        if not name.endswith(("_ms", "jobs_per_min", "peak_rss_mb")):
+            continue
+        old, new = base[name], cur[name]
+        delta = (new - old) / old if old else 0.0
+        worse = -delta if name.endswith("jobs_per_min") else delta
+        if name.endswith("_ms") and abs(new - old) < 1.0:
+            worse = 0.0  # Sub-millisecond noise on near-zero stub latencies
+        flag = ""
+        if worse > tolerance:
+            flag = "  ⚠️"
+            regressions.append(name)
+        print(f"{name:<44}{old:>12.2f}{new:>12.2f}{delta:>+9.1%}{flag}")
+    return regressions
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline InsightFlow benchmark against local stub upstreams")
+    parser.add_argument("--target", choices=("agent", "api", "both"), default="agent")
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--search-mode", default="web", choices=("web", "academic"))
+    parser.add_argument("--caches", action="store_true", help="Keep search/scrape/plan caches and the local index enabled")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="Status poll interval for --target api (s)")
+    parser.add_argument("--corpus-size", type=int, default=200)
+    parser.add_argument("--page-paragraphs", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=1234)
+    for route, label in (("tavily", "Tavily"), ("s2", "Semantic Scholar"), ("llm", "LLM"), ("pages", "web pages")):
+        parser.add_argument(f"--{route}-latency", type=float, default=0.0, help=f"{label} mean latency (ms)")
+        parser.add_argument(f"--{route}-jitter", type=float, default=0.0, help=f"{label} latency jitter (ms)")
+        parser.add_argument(f"--{route}-errors", type=float, default=0.0, help=f"{label} 500 rate (0-1)")
+        parser.add_argument(f"--{route}-rate-limit", type=float, default=0.0, help=f"{label} 429 rate (0-1)")
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression before flagging (fraction)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    faults = {
+        route: {
+            "latency_ms": getattr(args, f"{route}_latency"),
+            "jitter_ms": getattr(args, f"{route}_jitter"),
+            "error_rate": getattr(args, f"{route}_errors"),
+            "rate_limit_rate": getattr(args, f"{route}_rate_limit"),
+        }
+        for route in ROUTES
+    }
+
+    stubs = StubServer(faults, corpus_size=args.corpus_size, page_paragraphs=args.page_paragraphs, seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix="insightflow-bench-")
+
+    # Must happen before agent/tools/config are imported
+    os.environ.update(stubs.env())
+    os.environ["CHECKPOINT_DB"] = os.path.join(workdir, "checkpoints.sqlite")
+    os.environ["DOC_INDEX_DB"] = os.path.join(workdir, "doc_index.sqlite")
+    if not args.caches:
+        os.environ["TOOL_CACHE_TTL"] = "0"
+        os.environ["PLAN_CACHE_THRESHOLD"] = "2"
+
+    queries = make_queries(args.jobs)
+    results = {
+        "meta": {
+            "target": args.target,
+            "jobs": args.jobs,
+            "concurrency": args.concurrency,
+            "search_mode": args.search_mode,
+            "caches": args.caches,
+            "faults": faults,
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+    }
+
+    async def run_targets():
+        if args.target in ("agent", "both"):
+            stubs.reset_stats()
+            results["agent"] = await bench_agent(queries, args.concurrency, args.search_mode)
+            results["agent"]["upstream"] = upstream_report(stubs)
+        if args.target in ("api", "both"):
+            stubs.reset_stats()
+            results["api"] = await bench_api(queries, args.concurrency, args.search_mode, args.poll_interval)
+            results["api"]["upstream"] = upstream_report(stubs)
+
+    print(f"🏁 Benchmark: {args.jobs} jobs, concurrency {args.concurrency}, target {args.target}, stubs at {stubs.base_url}")
+    try:
+        asyncio.run(run_targets())
+    finally:
+        stubs.stop()
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    print(json.dumps({k: v for k, v in results.items() if k != "meta"}, indent=2))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Saved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} metrics regressed by more than {args.tolerance:.0%}")
+            return 1
+        print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
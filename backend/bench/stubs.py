@@ -0,0 +1,388 @@
+"""
+Local stand-ins for every upstream the agent talks to
+
+One threaded HTTP server serves all routes:
+    POST /tavily/search                      Tavily search API
+    GET  /s2/graph/v1/paper/search           Semantic Scholar paper search (paging, filters, field projection)
+    POST /s2/graph/v1/paper/batch            Semantic Scholar batch paper lookup
+    POST /llm/v1/chat/completions            OpenAI-compatible chat (plain, json_schema and tool calls)
+    GET  /llm/v1/models                      Model list (used by the startup warm-up)
+    GET  /pages/<n>.html                     Synthetic HTML corpus for the scraper
+    GET  /pages/<n>.pdf                      Synthetic open-access paper PDFs
+
+Each route can be given latency, jitter, error and 429 rates. The server
+records the latency it served per route so the benchmark can report upstream
+percentiles next to the agent's own stage timings.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+ROUTES = ("tavily", "s2", "llm", "pages")
+
+DEFAULT_FAULTS = {
+    "latency_ms": 0.0,       # Mean added latency
+    "jitter_ms": 0.0,        # Uniform +/- jitter around the mean
+    "error_rate": 0.0,       # Fraction of requests answered with 500
+    "rate_limit_rate": 0.0,  # Fraction of requests answered with 429
+}
+
+_WORDS = (
+    "adoption analysis benchmark capacity cohort deployment efficiency enterprise evaluation "
+    "framework growth impact latency market measurement migration model outcome performance "
+    "policy productivity regression reliability research revenue risk scaling security "
+    "students survey throughput trend usage workload"
+).split()
+
+_QUERY_RE = re.compile(r'(?:User Query|answer|Query):\s*"([^"]+)"')
+
+
+def _make_page(index: int, paragraphs: int) -> bytes:
+    rng = random.Random(index)
+    body = "\n".join(
+        f"<p>{' '.join(rng.choice(_WORDS) for _ in range(60))}. Figure {rng.randint(1, 99)}% in {rng.randint(2015, 2025)}.</p>"
+        for _ in range(paragraphs)
+    )
+    html = f"""<!DOCTYPE html>
+<html><head><title>Stub page {index}</title><style>p {{ margin: 0 }}</style><script>var x = {index};</script></head>
+<body><nav>Home | About</nav><header>Stub site</header>
+<article><h1>Stub article {index}</h1>
+{body}
+</article><footer>(c) stub</footer></body></html>"""
+    return html.encode("utf-8")
+
+
+def _make_pdf(index: int, pages: int) -> bytes:
+    """Minimal multi-page PDF (Helvetica text, one content stream per page)"""
+    rng = random.Random(index)
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(pages))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i in range(pages):
+        lines = [" ".join(rng.choice(_WORDS) for _ in range(12)) for _ in range(50)]
+        stream = "BT /F1 10 Tf 50 760 Td 14 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode())
+    
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+class StubServer:
+    """
+    Threaded HTTP server with per-route fault injection
+
+    Args:
+        faults: {route: {latency_ms, jitter_ms, error_rate, rate_limit_rate}}
+        corpus_size: Number of distinct HTML pages
+        page_paragraphs: Paragraphs per page (controls page size)
+        pdf_pages: Pages per PDF
+        seed: RNG seed for reproducible fault injection
+    """
+
+    def __init__(self, faults: Optional[dict] = None, corpus_size: int = 200,
+                 page_paragraphs: int = 40, pdf_pages: int = 12, seed: int = 1234):
+        self.faults = {route: {**DEFAULT_FAULTS, **(faults or {}).get(route, {})} for route in ROUTES}
+        self.corpus_size = corpus_size
+        self.page_paragraphs = page_paragraphs
+        self.pdf_pages = pdf_pages
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._pages: dict[int, bytes] = {}
+        self._pdfs: dict[int, bytes] = {}
+        self.samples: dict[str, list[float]] = {route: [] for route in ROUTES}
+        self.status_counts: dict[str, dict[int, int]] = {route: {} for route in ROUTES}
+        self._stats_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+            def do_GET(self):
+                stub._handle(self, "GET")
+
+            def do_POST(self):
+                stub._handle(self, "POST")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def env(self) -> dict:
+        """Environment variables that point the backend at this server"""
+        return {
+            "TAVILY_API_URL": f"{self.base_url}/tavily/search",
+            "SEMANTIC_SCHOLAR_API": f"{self.base_url}/s2/graph/v1",
+            "LLM_API_BASE": f"{self.base_url}/llm/v1",
+            "TAVILY_API_KEY": "stub",
+            "GROQ_API_KEY": "stub",
+        }
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            for route in ROUTES:
+                self.samples[route] = []
+                self.status_counts[route] = {}
+
+    # --- Request handling ---
+
+    def _route_of(self, path: str) -> Optional[str]:
+        for route in ROUTES:
+            if path.startswith(f"/{route}/"):
+                return route
+        return None
+
+    def _roll(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        started = time.perf_counter()
+        path = handler.path.split("?", 1)[0]
+        route = self._route_of(path)
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+
+        if route is None:
+            self._send(handler, 404, b'{"error": "not found"}')
+            return
+
+        faults = self.faults[route]
+        delay = faults["latency_ms"] + (self._roll() * 2 - 1) * faults["jitter_ms"]
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        roll = self._roll()
+        if roll < faults["rate_limit_rate"]:
+            status, payload, content_type = 429, b'{"error": "rate limited"}', "application/json"
+        elif roll < faults["rate_limit_rate"] + faults["error_rate"]:
+            status, payload, content_type = 500, b'{"error": "injected failure"}', "application/json"
+        else:
+            status, payload, content_type = self._respond(route, path, body, handler.path)
+
+        self._send(handler, status, payload, content_type)
+        with self._stats_lock:
+            self.samples[route].append(time.perf_counter() - started)
+            counts = self.status_counts[route]
+            counts[status] = counts.get(status, 0) + 1
+
+    def _send(self, handler: BaseHTTPRequestHandler, status: int, payload: bytes,
+              content_type: str = "application/json") -> None:
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(payload)))
+        if status == 429:
+            handler.send_header("Retry-After", "1")
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _respond(self, route: str, path: str, body: bytes, raw_path: str) -> tuple[int, bytes, str]:
+        if route == "pages":
+            match = re.match(r"/pages/(\d+)\.(html|pdf)$", path)
+            if not match:
+                return 404, b"not found", "text/plain"
+            index = int(match.group(1)) % self.corpus_size
+            if match.group(2) == "pdf":
+                if index not in self._pdfs:
+                    self._pdfs[index] = _make_pdf(index, self.pdf_pages)
+                return 200, self._pdfs[index], "application/pdf"
+            if index not in self._pages:
+                self._pages[index] = _make_page(index, self.page_paragraphs)
+            return 200, self._pages[index], "text/html; charset=utf-8"
+
+        if route == "tavily":
+            request = json.loads(body or b"{}")
+            return 200, json.dumps(self._tavily(request)).encode(), "application/json"
+
+        if route == "s2":
+            params = {k: v[0] for k, v in parse_qs(urlsplit(raw_path).query, keep_blank_values=True).items()}
+            if path.endswith("/paper/batch"):
+                ids = json.loads(body or b"{}").get("ids", [])
+                return 200, json.dumps(self._paper_batch(ids, params)).encode(), "application/json"
+            return 200, json.dumps(self._paper_search(params)).encode(), "application/json"
+
+        if path.endswith("/models"):
+            models = {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]}
+            return 200, json.dumps(models).encode(), "application/json"
+        
+        request = json.loads(body or b"{}")
+        return 200, json.dumps(self._chat_completion(request)).encode(), "application/json"
+
+    # --- Fake upstream payloads ---
+
+    def _tavily(self, request: dict) -> dict:
+        query = request.get("query", "")
+        seed = sum(map(ord, query))
+        results = []
+        for i in range(int(request.get("max_results", 5))):
+            page = (seed + i * 7) % self.corpus_size
+            results.append({
+                "title": f"{query} - result {i + 1}",
+                "url": f"{self.base_url}/pages/{page}.html",
+                "content": f"Snippet about {query}. " * 20,
+                "score": round(1.0 - i * 0.1, 2),
+            })
+        return {"query": query, "results": results}
+
+    def _paper(self, paper_id: str) -> dict:
+        """Deterministic paper record for an id"""
+        rng = random.Random(zlib.crc32(paper_id.encode()))
+        return {
+            "paperId": paper_id,
+            "title": f"Stub paper {paper_id}",
+            "url": None,
+            "abstract": " ".join(rng.choice(_WORDS) for _ in range(120)),
+            "year": rng.randint(2020, 2025),
+            "citationCount": rng.choice((0, 1, 3, 8, 20, 60, 150, 500)),
+            "isOpenAccess": rng.random() < 0.6,
+            "venue": "Stub Conference",
+        }
+
+    def _project(self, paper: dict, fields: str) -> dict:
+        record = {"paperId": paper["paperId"]}
+        for field in filter(None, fields.split(",")):
+            if field == "openAccessPdf":
+                record[field] = (
+                    {"url": f"{self.base_url}/pages/{zlib.crc32(paper['paperId'].encode()) % self.corpus_size}.pdf"}
+                    if paper["isOpenAccess"] else None
+                )
+            else:
+                record[field] = paper.get(field)
+        return record
+
+    def _paper_search(self, params: dict) -> dict:
+        """Relevance search over an endless per-query result list, honouring the API's filters"""
+        query = params.get("query", "")
+        offset = int(params.get("offset", 0))
+        limit = min(int(params.get("limit", 10)), 100)
+        min_citations = int(params.get("minCitationCount", 0))
+        open_access = "openAccessPdf" in params
+        year_start = int(params.get("year", "0-").split("-")[0] or 0)
+
+        # Walk the query's candidates, keeping those that pass the filters
+        matches = []
+        index = 0
+        while len(matches) < offset + limit and index < 1000:
+            paper = self._paper(f"{zlib.crc32(query.encode()):08x}{index:04d}")
+            index += 1
+            if paper["citationCount"] < min_citations or paper["year"] < year_start:
+                continue
+            if open_access and not paper["isOpenAccess"]:
+                continue
+            matches.append(paper)
+
+        fields = params.get("fields", "title")
+        page = [self._project(p, fields) for p in matches[offset:offset + limit]]
+        response = {"total": 1000, "offset": offset, "data": page}
+        if index < 1000:
+            response["next"] = offset + len(page)
+        return response
+
+    def _paper_batch(self, ids: list, params: dict) -> list:
+        fields = params.get("fields", "title")
+        return [self._project(self._paper(paper_id), fields) for paper_id in ids]
+
+    def _chat_completion(self, request: dict) -> dict:
+        prompt = "\n".join(
+            m["content"] if isinstance(m.get("content"), str) else json.dumps(m.get("content"))
+            for m in request.get("messages", [])
+        )
+        match = _QUERY_RE.search(prompt)
+        topic = match.group(1) if match else "the topic"
+
+        schema_name = None
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema_name = response_format["json_schema"]["name"]
+        tools = request.get("tools") or []
+        if tools:
+            schema_name = tools[0]["function"]["name"]
+
+        if schema_name == "ResearchPlan":
+            structured = {"items": [f"{topic} {aspect}" for aspect in ("overview", "statistics", "case studies", "risks")]}
+        elif schema_name == "ResearchInsights":
+            structured = {
+                "findings": [
+                    {"topic": f"{topic} finding {i}", "details": f"{40 + i}% of stub respondents agree.",
+                     "source_title": f"Stub page {i}", "source_url": f"{self.base_url}/pages/{i}.html"}
+                    for i in range(5)
+                ],
+                "further_research_needed": False,
+                "missing_information": [],
+            }
+        else:
+            structured = None
+
+        if structured is None:
+            message = {"role": "assistant", "content": f"# Executive Summary\n\nStub report on {topic}.\n\n" + "Lorem ipsum. " * 300}
+            finish_reason = "stop"
+        elif tools:
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": "call_stub",
+                    "type": "function",
+                    "function": {"name": schema_name, "arguments": json.dumps(structured)},
+                }],
+            }
+            finish_reason = "tool_calls"
+        else:
+            message = {"role": "assistant", "content": json.dumps(structured)}
+            finish_reason = "stop"
+
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(json.dumps(message)) // 4
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
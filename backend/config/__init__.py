@@ -0,0 +1,72 @@
+"""
+Runtime settings for the InsightFlow backend, read from the environment
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# SQLite file used by the LangGraph checkpointer (one thread per job)
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
+# Threads unused for this long are deleted (0 keeps them forever)
+CHECKPOINT_TTL_HOURS = float(os.getenv("CHECKPOINT_TTL_HOURS", "24"))
+
+# A job whose status streams all closed is cancelled after this many seconds
+# without a new subscriber (covers page refreshes and EventSource reconnects)
+STREAM_CANCEL_GRACE_S = float(os.getenv("STREAM_CANCEL_GRACE_S", "15"))
+
+# Shared search/scrape caches (seconds; 0 disables)
+TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "3600"))
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "2048"))
+
+# Where the batch API keeps uploaded query files and JSONL results
+BATCH_DIR = os.getenv("BATCH_DIR", os.path.join("data", "batches"))
+# LLM responses cached per batch run (entries, oldest evicted first)
+BATCH_LLM_CACHE_SIZE = int(os.getenv("BATCH_LLM_CACHE_SIZE", "1024"))
+
+# Local document index used by search_mode "local" / "hybrid"
+DOC_INDEX_DB = os.getenv("DOC_INDEX_DB", "doc_index.sqlite")
+LOCAL_MAX_AGE_DAYS = float(os.getenv("LOCAL_MAX_AGE_DAYS", "30"))
+# Hybrid mode falls back to the network when the index has fewer hits than this
+LOCAL_MIN_RESULTS = int(os.getenv("LOCAL_MIN_RESULTS", "2"))
+# A local document only counts as a hit if it contains this share (0-1) of the question's content words
+LOCAL_MIN_TERM_SHARE = float(os.getenv("LOCAL_MIN_TERM_SHARE", "0.6"))
+
+# Planner cache: reuse the plan of a similar past query (cosine similarity, 0-1; >1 disables)
+PLAN_CACHE_THRESHOLD = float(os.getenv("PLAN_CACHE_THRESHOLD", "0.85"))
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "512"))
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", "86400"))
+
+# Semantic Scholar: papers kept per research question (also the search page size;
+# filters are applied server-side, so one page usually suffices)
+ACADEMIC_RESULTS = int(os.getenv("ACADEMIC_RESULTS", "5"))
+ACADEMIC_MAX_PAGES = int(os.getenv("ACADEMIC_MAX_PAGES", "3"))
+# Minimum spacing between Semantic Scholar requests across all jobs (seconds)
+SEMANTIC_SCHOLAR_MIN_INTERVAL_S = float(os.getenv("SEMANTIC_SCHOLAR_MIN_INTERVAL_S", "1.0"))
+
+# Upstream endpoints (overridable, e.g. to point the benchmark at local stubs)
+LLM_API_BASE = os.getenv("LLM_API_BASE", "https://api.groq.com/openai/v1")
+TAVILY_API_URL = os.getenv("TAVILY_API_URL", "https://api.tavily.com/search")
+SEMANTIC_SCHOLAR_API = os.getenv("SEMANTIC_SCHOLAR_API", "https://api.semanticscholar.org/graph/v1")
+
+# Per-job Chrome traces (/api/trace/{job_id}); requests can also opt in with trace=true
+TRACE_JOBS = os.getenv("TRACE_JOBS", "false").lower() in ("1", "true", "yes")
+TRACE_PROFILE = os.getenv("TRACE_PROFILE", "false").lower() in ("1", "true", "yes")
+TRACE_SAMPLE_INTERVAL_MS = float(os.getenv("TRACE_SAMPLE_INTERVAL_MS", "5"))
+# How many finished traces to keep in memory
+TRACE_KEEP = int(os.getenv("TRACE_KEEP", "50"))
+
+# Log lines kept per job (oldest dropped first)
+LOG_BUFFER_SIZE = int(os.getenv("LOG_BUFFER_SIZE", "500"))
+
+# PDF ingestion (open-access papers in academic mode, /api/upload)
+# Fetch the open-access PDF of the top paper per research question
+PDF_FULLTEXT = os.getenv("PDF_FULLTEXT", "true").lower() in ("1", "true", "yes")
+# Characters of each paper's full text shown to the analyzer (the rest stays in the sources view and local index)
+ANALYSIS_FULLTEXT_CHARS = int(os.getenv("ANALYSIS_FULLTEXT_CHARS", "4000"))
+PDF_MAX_MB = float(os.getenv("PDF_MAX_MB", "25"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "20000"))
+# Parser threads (parsing is CPU-bound, so keep this small)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
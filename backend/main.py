@@ -1,15 +1,82 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Form, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse, FileResponse, PlainTextResponse
 from pydantic import BaseModel
 import uuid
 import asyncio
+import json
+import threading
+import time
+import importlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from typing import Dict, Optional
 import os
+import sys
 from dotenv import load_dotenv
+from config import (BATCH_DIR, TRACE_JOBS, TRACE_PROFILE, TRACE_SAMPLE_INTERVAL_MS, TRACE_KEEP, CHECKPOINT_TTL_HOURS,
+                    STREAM_CANCEL_GRACE_S)
+from utils.metrics import JobMetrics, registry
+from utils.tracing import JobTrace
+from utils.joblog import JobLog
 
 load_dotenv()
 
-app = FastAPI(title="InsightFlow API")
+# Warm-up state reported by /api/health. The agent stack (langchain, langgraph,
+# openai) is only imported here in the background, so the port opens right away.
+startup = {
+    "ready": False,
+    "started_at": time.time(),
+    "timings": {},
+    "error": None
+}
+
+async def warm_up():
+    """Import the agent, build clients, open the shared graph/checkpointer and upstream connections"""
+    began = time.perf_counter()
+    try:
+        started = time.perf_counter()
+        agent = await asyncio.to_thread(importlib.import_module, "agent")
+        startup["timings"]["import_s"] = round(time.perf_counter() - started, 3)
+        
+        startup["timings"].update(await agent.warm_up())
+        startup["timings"]["total_s"] = round(time.perf_counter() - began, 3)
+        startup["ready"] = True
+        print(f"🔥 Warm-up complete in {startup['timings']['total_s']}s: {startup['timings']}")
+    except Exception as e:
+        startup["error"] = str(e)
+        print(f"❌ Warm-up failed: {e}")
+        return
+    
+    if CHECKPOINT_TTL_HOURS > 0:
+        await prune_checkpoints_periodically(agent)
+
+async def prune_checkpoints_periodically(agent):
+    """Delete checkpoint threads unused for CHECKPOINT_TTL_HOURS, once an hour"""
+    while True:
+        try:
+            deleted = await agent.prune_checkpoints(CHECKPOINT_TTL_HOURS * 3600)
+            if deleted:
+                print(f"🧹 Pruned {deleted} checkpoint threads")
+        except Exception as e:
+            print(f"⚠️ Checkpoint pruning failed: {e}")
+        await asyncio.sleep(3600)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = asyncio.create_task(warm_up())
+    yield
+    task.cancel()
+    agent = sys.modules.get("agent")
+    if agent is not None:
+        await agent.close_checkpointer()
+    tools = sys.modules.get("tools")
+    if tools is not None:
+        tools.http.close()
+        tools.pdf_pool.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(title="InsightFlow API", lifespan=lifespan)
 
 # CORS for Next.js
 app.add_middleware(
@@ -20,18 +87,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses (results, status, traces). SSE is left uncompressed.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # In-memory job storage (will use Redis later)
 research_jobs: Dict[str, dict] = {}
 
+# Runtime handles per job (task, cancel event, stream subscribers).
+# Kept apart from research_jobs because that dict is returned as JSON.
+job_controls: Dict[str, dict] = {}
+
+# Full source documents of completed jobs; results only carry descriptors
+job_sources: Dict[str, list] = {}
+
+# Per-job log ring buffers (shared by reference with the running agent)
+job_logs: Dict[str, JobLog] = {}
+
+# Chrome traces of traced jobs, oldest evicted first (TRACE_KEEP)
+job_traces: "OrderedDict[str, JobTrace]" = OrderedDict()
+
+# Batch runs (see batch.py), keyed by batch_id
+batch_jobs: Dict[str, dict] = {}
+
 class ResearchRequest(BaseModel):
     query: str
-    search_mode: str = "web"  # 'web' or 'academic'
+    search_mode: str = "web"  # 'web', 'academic', 'local' (index only) or 'hybrid'
     min_citations: int = 0
     open_access: bool = False
+    trace: bool = False    # Record a Chrome trace (also on for all jobs with TRACE_JOBS)
+    profile: bool = False  # With trace: sample stacks of CPU-heavy steps
+
+class RetryRequest(BaseModel):
+    report_model: Optional[str] = None  # Re-write the report with another model
 
 class StatusResponse(BaseModel):
     job_id: str
-    status: str  # 'processing', 'completed', 'error'
+    status: str  # 'processing', 'completed', 'error', 'cancelled'
     progress: Optional[str] = None
     result: Optional[dict] = None
     error: Optional[str] = None
@@ -49,31 +140,249 @@ async def create_research(request: ResearchRequest):
         "status": "processing",
         "query": request.query,
         "mode": request.search_mode,
+        "min_citations": request.min_citations,
+        "open_access": request.open_access,
+        "trace": request.trace or TRACE_JOBS,
+        "profile": request.profile or TRACE_PROFILE,
         "progress": "Initializing agent...",
         "current_step": "Planning",
-        "logs": ["🚀 System initialized."],
         "result": None,
         "error": None
     }
     
+    job_logs[job_id] = JobLog()
+    job_logs[job_id].append("🚀 System initialized.")
+    start_job(job_id)
+    
+    return {"job_id": job_id, "status": "processing"}
+
+def job_payload(job_id: str, logs_since: int = 0, logs_limit: Optional[int] = None) -> dict:
+    """
+    Status payload for a job
+    
+    `logs` is sliced from the ring buffer: pass the previous `logs_total` as
+    `logs_since` to receive only new lines.
+    """
+    job = research_jobs[job_id]
+    controls = job_controls.get(job_id)
+    if controls is not None:
+        job["metrics"] = controls["metrics"].summary()
+    
+    log = job_logs[job_id]
+    return {
+        **job,
+        "logs": log.messages(logs_since, logs_limit),
+        "logs_total": log.total
+    }
+
+def source_descriptor(job_id: str, index: int, source: dict) -> dict:
+    """Lightweight view of a source for the result payload (content is fetched lazily)"""
+    return {
+        "index": index,
+        "title": source.get("title", ""),
+        "url": source.get("url", ""),
+        "content_length": len(source.get("content") or ""),
+        "content_url": f"/api/result/{job_id}/sources/{index}"
+    }
+
+def start_job(job_id: str, report_model: Optional[str] = None):
+    """Launch the agent for a job in the background (job_id doubles as checkpoint thread)"""
+    job = research_jobs[job_id]
+    cancel_event = threading.Event()
+    metrics = JobMetrics()
+    trace = None
+    if job.get("trace"):
+        trace = JobTrace(profile=job.get("profile", False), sample_interval_ms=TRACE_SAMPLE_INTERVAL_MS)
+        job_traces[job_id] = trace
+        job_traces.move_to_end(job_id)
+        while len(job_traces) > TRACE_KEEP:
+            job_traces.popitem(last=False)
+    
     # Start agent in background
-    asyncio.create_task(run_research_agent(
+    task = asyncio.create_task(run_research_agent(
         job_id, 
-        request.query, 
-        request.search_mode, 
-        request.min_citations, 
-        request.open_access
+        job["query"], 
+        job["mode"], 
+        job["min_citations"], 
+        job["open_access"],
+        cancel_event,
+        report_model,
+        metrics,
+        trace,
+        job_logs[job_id]
     ))
+    job_controls[job_id] = {"task": task, "cancel_event": cancel_event, "subscribers": 0, "metrics": metrics}
+
+@app.post("/api/research/{job_id}/retry")
+async def retry_research(job_id: str, request: Optional[RetryRequest] = None):
+    """
+    Resume a failed or cancelled job from its last checkpoint
+    
+    With `report_model`, a finished job only re-runs the report step on the
+    stored gather/analyze state.
+    """
+    if job_id not in research_jobs:
+        # Not in memory (e.g. the server restarted since): rebuild it from its checkpoint
+        from agent import load_checkpoint
+        
+        state = await load_checkpoint(job_id)
+        if state is None:
+            return {"error": "Job not found"}
+        
+        research_jobs[job_id] = {
+            "status": "processing",
+            "query": state["query"],
+            "mode": state.get("search_mode", "web"),
+            "min_citations": state.get("min_citations", 0),
+            "open_access": state.get("open_access", False),
+            "trace": TRACE_JOBS,
+            "profile": TRACE_PROFILE,
+            "progress": "Resuming from checkpoint...",
+            "current_step": state.get("current_step", "Planning"),
+            "result": None,
+            "error": None
+        }
+        job_logs[job_id] = JobLog()
+        job_logs[job_id].append("♻️ Job restored from checkpoint.")
+    
+    controls = job_controls.get(job_id)
+    if controls is not None and not controls["task"].done():
+        return {"error": "Job is still running"}
+    
+    job = research_jobs[job_id]
+    job.update({
+        "status": "processing",
+        "progress": "Resuming from checkpoint...",
+        "error": None
+    })
+    start_job(job_id, request.report_model if request else None)
     
     return {"job_id": job_id, "status": "processing"}
 
+def cancel_job(job_id: str, reason: str) -> bool:
+    """
+    Stop a running job
+    
+    Sets the cooperative cancel event (checked by tools running in worker
+    threads) and cancels the asyncio task, which aborts in-flight LLM calls.
+    
+    Returns:
+        True if the job was still running
+    """
+    controls = job_controls.get(job_id)
+    if controls is None or controls["task"].done():
+        return False
+    
+    controls["cancel_event"].set()
+    controls["task"].cancel()
+    research_jobs[job_id]["progress"] = reason
+    print(f"🛑 Cancelling job {job_id[:8]}...: {reason}")
+    return True
+
+def add_subscriber(job_id: str) -> None:
+    """Count a new stream subscriber and drop any pending abandon-cancel"""
+    controls = job_controls.get(job_id)
+    if controls is None:
+        return
+    controls["subscribers"] += 1
+    timer = controls.pop("cancel_timer", None)
+    if timer is not None:
+        timer.cancel()
+
+def remove_subscriber(job_id: str) -> None:
+    """
+    Count a stream subscriber leaving
+    
+    When the last one leaves, the job is cancelled after STREAM_CANCEL_GRACE_S
+    unless someone subscribes again first (page refresh, EventSource reconnect).
+    """
+    controls = job_controls.get(job_id)
+    if controls is None:
+        return
+    controls["subscribers"] -= 1
+    if controls["subscribers"] > 0 or controls["task"].done():
+        return
+    
+    def cancel_if_abandoned():
+        controls.pop("cancel_timer", None)
+        # A retry replaces the job's controls; only cancel the run that was abandoned
+        if controls["subscribers"] == 0 and job_controls.get(job_id) is controls:
+            cancel_job(job_id, "Cancelled: all subscribers disconnected")
+    
+    controls["cancel_timer"] = asyncio.get_running_loop().call_later(STREAM_CANCEL_GRACE_S, cancel_if_abandoned)
+
+@app.delete("/api/research/{job_id}")
+async def delete_research(job_id: str):
+    """Cancel a running job"""
+    if job_id not in research_jobs:
+        return {"error": "Job not found"}
+    
+    cancelled = cancel_job(job_id, "Cancelled by user")
+    return {"job_id": job_id, "status": research_jobs[job_id]["status"], "cancelled": cancelled}
+
+@app.get("/api/stream/{job_id}")
+async def stream_status(job_id: str, request: Request):
+    """
+    Stream job status as Server-Sent Events
+    
+    When the last subscriber disconnects and nobody reconnects within
+    STREAM_CANCEL_GRACE_S, the job is cancelled, since nobody is left to read
+    the report.
+    """
+    if job_id not in research_jobs:
+        return {"error": "Job not found"}
+    
+    # EventSource sends back the last event id when it reconnects
+    try:
+        resume_from = int(request.headers.get("last-event-id") or 0)
+    except ValueError:
+        resume_from = 0
+    
+    async def event_stream():
+        add_subscriber(job_id)
+        try:
+            logs_since = resume_from
+            while True:
+                # Each event only carries log lines the subscriber hasn't seen yet
+                payload = job_payload(job_id, logs_since)
+                logs_since = payload["logs_total"]
+                yield f"id: {logs_since}\ndata: {json.dumps(payload, default=str)}\n\n"
+                if payload["status"] != "processing" or await request.is_disconnected():
+                    break
+                await asyncio.sleep(1.0)
+        finally:
+            remove_subscriber(job_id)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.get("/api/status/{job_id}")
-async def get_status(job_id: str):
+async def get_status(job_id: str, logs_since: int = 0, logs_limit: Optional[int] = None):
     """Check job status"""
     if job_id not in research_jobs:
         return {"error": "Job not found"}
     
-    return research_jobs[job_id]
+    return job_payload(job_id, logs_since, logs_limit)
+
+@app.get("/api/logs/{job_id}")
+async def get_logs(job_id: str, since: int = 0, limit: Optional[int] = None):
+    """Structured log records (timestamp, level, stage, message)"""
+    if job_id not in job_logs:
+        return {"error": "Job not found"}
+    
+    log = job_logs[job_id]
+    return {
+        "records": [r.to_dict() for r in log.records(since, limit)],
+        "first_index": log.first_index,
+        "total": log.total
+    }
+
+@app.get("/api/trace/{job_id}")
+async def get_trace(job_id: str):
+    """Timeline of a traced job in Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+    if job_id not in job_traces:
+        return {"error": "No trace for this job (start it with trace=true or set TRACE_JOBS)"}
+    
+    return job_traces[job_id].to_chrome()
 
 @app.get("/api/result/{job_id}")
 async def get_result(job_id: str):
@@ -87,101 +396,200 @@ async def get_result(job_id: str):
     
     return job["result"]
 
-# @app.post("/api/upload")
-# async def upload_file(file: UploadFile = File(...)):
-#     """Handle PDF uploads"""
-#     # TODO: Implement PDF parsing
-#     return {"filename": file.filename, "status": "uploaded"}
+@app.get("/api/result/{job_id}/sources/{idx}")
+async def get_source(job_id: str, idx: int):
+    """Full content of one source of a completed job"""
+    if job_id not in job_sources:
+        return {"error": "Job not found or not completed yet"}
+    
+    sources = job_sources[job_id]
+    if not 0 <= idx < len(sources):
+        return {"error": f"Source index out of range (0-{len(sources) - 1})"}
+    
+    return {"index": idx, **sources[idx]}
+
+@app.post("/api/batch")
+async def create_batch(file: UploadFile = File(...), concurrency: int = Form(4)):
+    """Start a batch run from an uploaded JSONL file of queries"""
+    if concurrency < 1:
+        return {"error": "concurrency must be at least 1"}
+    
+    batch_id = str(uuid.uuid4())
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    input_path = os.path.join(BATCH_DIR, f"{batch_id}.input.jsonl")
+    with open(input_path, "wb") as f:
+        f.write(await file.read())
+    
+    batch_jobs[batch_id] = {
+        "status": "processing",
+        "input_path": input_path,
+        "output_path": os.path.join(BATCH_DIR, f"{batch_id}.jsonl"),
+        "concurrency": concurrency,
+        "stats": None,
+        "error": None
+    }
+    asyncio.create_task(run_batch_job(batch_id))
+    
+    return {"batch_id": batch_id, "status": "processing"}
+
+@app.post("/api/batch/{batch_id}/resume")
+async def resume_batch(batch_id: str):
+    """Re-run a batch, skipping items already in its output file"""
+    if batch_id not in batch_jobs:
+        return {"error": "Batch not found"}
+    if batch_jobs[batch_id]["status"] == "processing":
+        return {"error": "Batch is still running"}
+    
+    batch_jobs[batch_id].update({"status": "processing", "error": None})
+    asyncio.create_task(run_batch_job(batch_id))
+    return {"batch_id": batch_id, "status": "processing"}
+
+@app.get("/api/batch/{batch_id}")
+async def get_batch(batch_id: str):
+    """Batch status and throughput statistics"""
+    if batch_id not in batch_jobs:
+        return {"error": "Batch not found"}
+    
+    batch = batch_jobs[batch_id]
+    return {"batch_id": batch_id, "status": batch["status"], "stats": batch["stats"], "error": batch["error"]}
+
+@app.get("/api/batch/{batch_id}/results")
+async def get_batch_results(batch_id: str):
+    """Download the JSONL results written so far"""
+    if batch_id not in batch_jobs:
+        return {"error": "Batch not found"}
+    
+    output_path = batch_jobs[batch_id]["output_path"]
+    if not os.path.exists(output_path):
+        return {"error": "No results yet"}
+    return FileResponse(output_path, media_type="application/x-ndjson", filename=f"{batch_id}.jsonl")
+
+@app.post("/api/upload")
+async def upload_file(file: UploadFile = File(...)):
+    """Handle PDF uploads: extract the text and add it to the local document index"""
+    from tools import ingest_pdf
+    
+    try:
+        info = await asyncio.to_thread(ingest_pdf, file.file, file.filename or "upload.pdf")
+    except ValueError as e:
+        return {"error": f"Could not ingest {file.filename}: {e}"}
+    except Exception as e:
+        print(f"❌ Upload failed for {file.filename}: {e}")
+        return {"error": f"Could not parse {file.filename}"}
+    finally:
+        await file.close()
+    
+    return {**info, "status": "indexed" if info["indexed"] else "empty"}
+
+@app.get("/api/metrics")
+async def metrics():
+    """Prometheus metrics: span durations, bytes, tokens, retries, cache hits, jobs"""
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
 
 @app.get("/api/health")
-async def health():
-    """Health check"""
+async def health(response: Response):
+    """Health check. Answers 503 until warm-up has finished, so it doubles as a readiness probe."""
+    if not startup["ready"]:
+        response.status_code = 503
     return {
-        "status": "healthy",
+        "status": "healthy" if startup["ready"] else ("error" if startup["error"] else "warming"),
+        "ready": startup["ready"],
+        "uptime_s": round(time.time() - startup["started_at"], 1),
+        "warmup": startup["timings"],
+        "warmup_error": startup["error"],
         "openrouter_key_set": bool(os.getenv("OPENROUTER_API_KEY"))
     }
 
-async def run_research_agent(job_id: str, query: str, search_mode: str = "web", min_citations: int = 0, open_access: bool = False):
+async def run_research_agent(job_id: str, query: str, search_mode: str = "web", min_citations: int = 0, open_access: bool = False,
+                             cancel_event: Optional[threading.Event] = None, report_model: Optional[str] = None,
+                             metrics: Optional[JobMetrics] = None, trace: Optional[JobTrace] = None,
+                             log: Optional[JobLog] = None):
+    from agent import run_agent
+    
+    # Progress shown while each node runs, and once it has finished
+    steps = {
+        "plan": ("Planning", 0, "Breaking down your query...",
+                 lambda r: f"Created {len(r['research_plan'])} research questions"),
+        "gather": ("Gathering", 1, "Searching the web...",
+                   lambda r: f"Found {sum(len(v) for v in r['search_results'].values())} sources"),
+        "analyze": ("Analyzing", 2, "Extracting key insights...",
+                    lambda r: f"Extracted {len(r['key_findings'])} findings"),
+        "report": ("Reporting", 3, "Generating report...",
+                   lambda r: "Report complete!")
+    }
+    
+    def on_node(name: str, event: str, state: dict):
+        # Bound to this run only (through a ContextVar in agent.py), so concurrent
+        # jobs never see each other's hooks
+        step, index, running, done = steps[name]
+        job = research_jobs[job_id]
+        if event == "start":
+            job["current_step"] = step
+            job["current_step_index"] = index
+            job["progress"] = running
+        else:
+            job["progress"] = done(state)
+    
     try:
-        from agent import run_agent
-        
-        # We'll monkey-patch the agent to report progress
-        # Import the original functions
-        from agent import plan_research, gather_information, analyze_information, generate_report
-        
-        # Wrap each function to update progress
-        original_plan = plan_research
-        original_gather = gather_information
-        original_analyze = analyze_information
-        original_report = generate_report
-        
-        def plan_with_progress(state):
-            research_jobs[job_id]["current_step"] = "Planning"
-            research_jobs[job_id]["current_step_index"] = 0  # ← ADD THIS
-            research_jobs[job_id]["progress"] = "Breaking down your query..."
-            result = original_plan(state)
-            if "logs" in result: research_jobs[job_id]["logs"] = result["logs"]
-            research_jobs[job_id]["progress"] = f"Created {len(result['research_plan'])} research questions"
-            return result
-
-        def gather_with_progress(state):
-            research_jobs[job_id]["current_step"] = "Gathering"
-            research_jobs[job_id]["current_step_index"] = 1  # ← ADD THIS
-            research_jobs[job_id]["progress"] = "Searching the web..."
-            result = original_gather(state)
-            if "logs" in result: research_jobs[job_id]["logs"] = result["logs"]
-            total = sum(len(r) for r in result['search_results'].values())
-            research_jobs[job_id]["progress"] = f"Found {total} sources"
-            return result
-
-        def analyze_with_progress(state):
-            research_jobs[job_id]["current_step"] = "Analyzing"
-            research_jobs[job_id]["current_step_index"] = 2  # ← ADD THIS
-            research_jobs[job_id]["progress"] = "Extracting key insights..."
-            result = original_analyze(state)
-            if "logs" in result: research_jobs[job_id]["logs"] = result["logs"]
-            research_jobs[job_id]["progress"] = f"Extracted {len(result['key_findings'])} findings"
-            return result
-
-        def report_with_progress(state):
-            research_jobs[job_id]["current_step"] = "Reporting"
-            research_jobs[job_id]["current_step_index"] = 3  # ← ADD THIS
-            research_jobs[job_id]["progress"] = "Generating report..."
-            result = original_report(state)
-            if "logs" in result: research_jobs[job_id]["logs"] = result["logs"]
-            research_jobs[job_id]["progress"] = "Report complete!"
-            return result
-        
-        # Monkey-patch (temporary override)
-        import agent
-        agent.plan_research = plan_with_progress
-        agent.gather_information = gather_with_progress
-        agent.analyze_information = analyze_with_progress
-        agent.generate_report = report_with_progress
-        
         # Run agent
-        result = await run_agent(query, search_mode, min_citations, open_access)
+        result = await run_agent(query, search_mode, min_citations, open_access, cancel_event=cancel_event,
+                                 thread_id=job_id, report_model=report_model, metrics=metrics,
+                                 trace=trace, log=log, on_node=on_node)
         
-        # Restore original functions
-        agent.plan_research = original_plan
-        agent.gather_information = original_gather
-        agent.analyze_information = original_analyze
-        agent.generate_report = original_report
-        
-        # Mark complete
+        # Mark complete. Full source text is kept aside and served per source.
+        job_sources[job_id] = result["sources"]
         research_jobs[job_id]["status"] = "completed"
-        research_jobs[job_id]["result"] = result
-        if "logs" in result: research_jobs[job_id]["logs"] = result["logs"]
+        research_jobs[job_id]["result"] = {
+            **result,
+            "sources": [source_descriptor(job_id, i, s) for i, s in enumerate(result["sources"])]
+        }
         research_jobs[job_id]["progress"] = "Complete!"
         research_jobs[job_id]["current_step"] = "Complete"
         
         print(f"✅ Job {job_id[:8]}... completed successfully")
         
+    except asyncio.CancelledError:
+        # Also covers JobCancelled raised by tools in worker threads
+        if cancel_event is not None:
+            cancel_event.set()
+        research_jobs[job_id]["status"] = "cancelled"
+        research_jobs[job_id]["current_step"] = "Cancelled"
+        print(f"🛑 Job {job_id[:8]}... cancelled")
+        
     except Exception as e:
         research_jobs[job_id]["status"] = "error"
         research_jobs[job_id]["error"] = str(e)
         research_jobs[job_id]["current_step"] = "Error"
         print(f"❌ Job {job_id[:8]}... failed: {e}")
+    
+    finally:
+        job_controls.pop(job_id, None)
+        if metrics is not None:
+            research_jobs[job_id]["metrics"] = metrics.summary()
+        registry.inc("insightflow_jobs_total", help="Finished research jobs", status=research_jobs[job_id]["status"])
+
+async def run_batch_job(batch_id: str):
+    from batch import run_batch
+    
+    batch = batch_jobs[batch_id]
+    
+    def on_progress(stats: dict):
+        batch["stats"] = stats
+    
+    try:
+        batch["stats"] = await run_batch(
+            batch["input_path"],
+            batch["output_path"],
+            concurrency=batch["concurrency"],
+            batch_id=batch_id,
+            on_progress=on_progress
+        )
+        batch["status"] = "completed"
+        print(f"✅ Batch {batch_id[:8]}... completed")
+    except Exception as e:
+        batch["status"] = "error"
+        batch["error"] = str(e)
+        print(f"❌ Batch {batch_id[:8]}... failed: {e}")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,91 @@
+import pytest
+
+import tools
+
+PAPERS = [
+    {"paperId": "p1", "title": "Perovskite stability", "year": 2023, "citationCount": 40},
+    {"paperId": "p2", "title": "Tandem solar cells", "year": 2022, "citationCount": 12},
+]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    tools.search_cache.clear()
+    yield
+    tools.search_cache.clear()
+
+
+def fake_search(monkeypatch, calls):
+    def search(query, *args, **kwargs):
+        calls.append(query)
+        return [dict(p) for p in PAPERS]
+    monkeypatch.setattr(tools, "_search_papers", search)
+
+
+def test_results_cached_when_all_details_found(monkeypatch):
+    calls = []
+    fake_search(monkeypatch, calls)
+    monkeypatch.setattr(tools, "_semantic_scholar_request", lambda *a, **kw: [
+        {"url": f"https://s2/{i}", "abstract": f"abstract {i}", "venue": "Nature", "openAccessPdf": None}
+        for i in kw["json"]["ids"]
+    ])
+
+    first = tools.search_academic_multiple(["perovskite"])["perovskite"]
+    second = tools.search_academic_multiple(["perovskite"])["perovskite"]
+    assert calls == ["perovskite"]
+    assert second == first
+    assert first[0]["content"].startswith("Abstract: abstract p1")
+
+
+def test_failed_batch_lookup_is_not_cached(monkeypatch):
+    calls = []
+    fake_search(monkeypatch, calls)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("HTTP 500")
+    monkeypatch.setattr(tools, "_semantic_scholar_request", fail)
+
+    results = tools.search_academic_multiple(["perovskite"])["perovskite"]
+    assert len(results) == 2
+    tools.search_academic_multiple(["perovskite"])
+    assert calls == ["perovskite", "perovskite"]
+
+
+def test_partial_batch_lookup_is_not_cached(monkeypatch):
+    calls = []
+    fake_search(monkeypatch, calls)
+    # Second id unknown to the batch endpoint
+    monkeypatch.setattr(tools, "_semantic_scholar_request", lambda *a, **kw: [
+        {"url": "https://s2/p1", "abstract": "abstract p1", "venue": "Nature", "openAccessPdf": None}, None,
+    ])
+
+    tools.search_academic_multiple(["perovskite"])
+    tools.search_academic_multiple(["perovskite"])
+    assert calls == ["perovskite", "perovskite"]
+    assert tools.search_cache.get(("paper", "p1")) is not None  # Found details are still reused
+
+
+def test_details_from_search_skip_batch_lookup(monkeypatch):
+    def search(query, *args, **kwargs):
+        return [{**p, "url": f"https://s2/{p['paperId']}", "abstract": "text", "venue": "Nature",
+                 "openAccessPdf": {"url": f"https://pdf/{p['paperId']}"}} for p in PAPERS]
+    monkeypatch.setattr(tools, "_search_papers", search)
+
+    def no_batch(*args, **kwargs):
+        raise AssertionError("batch lookup not needed")
+    monkeypatch.setattr(tools, "_semantic_scholar_request", no_batch)
+
+    results = tools.search_academic_multiple(["perovskite"])["perovskite"]
+    assert results[0]["pdf_url"] == "https://pdf/p1"
+    assert tools.search_cache.get(("paper", "p2"))["abstract"] == "text"
+    assert tools.search_cache.get(("academic", "perovskite", 0, False, 2020, tools.ACADEMIC_RESULTS)) is not None
+
+
+def test_pacing_skips_first_wait(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(tools, "cancellable_sleep", sleeps.append)
+    monkeypatch.setattr(tools, "_s2_next_slot", 0.0)
+    tools._semantic_scholar_wait_turn()
+    assert sleeps == []
+    tools._semantic_scholar_wait_turn()
+    assert len(sleeps) == 1 and 0 < sleeps[0] <= tools.SEMANTIC_SCHOLAR_MIN_INTERVAL_S
@@ -0,0 +1,85 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cache import TTLCache
+
+
+def test_get_returns_copy():
+    cache = TTLCache("test", maxsize=4, ttl=60)
+    value = [{"title": "a"}]
+    cache.set("k", value)
+    value[0]["title"] = "changed"
+
+    cached = cache.get("k")
+    assert cached == [{"title": "a"}]
+    cached[0]["title"] = "changed again"
+    assert cache.get("k") == [{"title": "a"}]
+
+
+def test_miss_and_stats():
+    cache = TTLCache("test", maxsize=4, ttl=60)
+    assert cache.get("missing") is None
+    cache.set("k", 1)
+    assert cache.get("k") == 1
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache("test", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the oldest
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_entries_expire():
+    cache = TTLCache("test", maxsize=4, ttl=0.01)
+    cache.set("k", 1)
+    time.sleep(0.02)
+    assert cache.get("k") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_zero_ttl_disables():
+    cache = TTLCache("test", maxsize=4, ttl=0)
+    cache.set("k", 1)
+    assert cache.get("k") is None
+
+
+def test_claim_runs_one_fetch_per_key():
+    cache = TTLCache("test", maxsize=4, ttl=60)
+    calls = []
+    started = threading.Barrier(4)
+
+    def fetch(key):
+        started.wait()
+        with cache.claim(key):
+            value = cache.get(key)
+            if value is None:
+                calls.append(key)
+                time.sleep(0.05)
+                value = f"value of {key}"
+                cache.set(key, value)
+            return value
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        values = list(pool.map(fetch, ["a", "a", "a", "b"]))
+    assert values == ["value of a"] * 3 + ["value of b"]
+    assert sorted(calls) == ["a", "b"]
+    assert cache._inflight == {}
+
+
+def test_claim_is_released_on_error():
+    cache = TTLCache("test", maxsize=4, ttl=60)
+    try:
+        with cache.claim("k"):
+            raise RuntimeError("fetch failed")
+    except RuntimeError:
+        pass
+    with cache.claim("k"):  # Would block forever if the lock leaked
+        pass
+    assert cache._inflight == {}
@@ -0,0 +1,77 @@
+from utils.doc_index import DocumentIndex
+
+DOCS = [
+    {
+        "url": "https://example.com/solar",
+        "title": "Solar panel efficiency in 2024",
+        "content": "Perovskite solar cells pushed panel efficiency past 30 percent. "
+                   "What are the effects of heat on solar output? Efficiency drops as panels warm.",
+        "score": 0.9,
+    },
+    {
+        "url": "https://example.com/ev",
+        "title": "Electric vehicle adoption",
+        "content": "Electric vehicle sales grew in Europe and China. Charging networks are the main "
+                   "constraint, and the effects of subsidies on consumer adoption are large.",
+        "score": 0.8,
+    },
+    {
+        "url": "https://example.com/battery",
+        "title": "Battery health and degradation",
+        "content": "Lithium-ion battery health declines with fast charging and high temperatures. "
+                   "Solid-state batteries promise higher energy density.",
+        "score": 0.7,
+    },
+]
+
+
+def make_index(tmp_path):
+    index = DocumentIndex(str(tmp_path / "index.sqlite"))
+    assert index.add_documents(DOCS, "web") == 3
+    return index
+
+
+def test_search_ranks_relevant_document_first(tmp_path):
+    index = make_index(tmp_path)
+    results = index.search("How efficient are perovskite solar panels?", max_results=3, min_term_share=0.6)
+    assert results
+    assert results[0]["url"] == "https://example.com/solar"
+    assert results[0]["source"] == "web"
+
+
+def test_off_topic_query_returns_nothing(tmp_path):
+    index = make_index(tmp_path)
+    query = "What are the health effects of coffee consumption?"
+    # Stop words alone ("what", "are", "the") never match
+    assert index.search("What are the", min_term_share=0.6) == []
+    # "health" and "effects" appear in the corpus, but half the question is not coverage
+    assert index.search(query, min_term_share=0.6) == []
+
+
+def test_term_share_is_reported(tmp_path):
+    index = make_index(tmp_path)
+    results = index.search("battery health charging", max_results=3)
+    assert results[0]["url"] == "https://example.com/battery"
+    assert results[0]["term_share"] == 1.0
+    assert all(0 < r["term_share"] <= 1 for r in results)
+
+
+def test_upsert_keeps_longer_content(tmp_path):
+    index = make_index(tmp_path)
+    index.add_documents([{"url": "https://example.com/solar", "title": "Solar", "content": "short"}], "web")
+    assert index.stats()["documents"] == 3
+    results = index.search("perovskite", max_results=1)
+    assert "Perovskite solar cells" in results[0]["content"]
+    assert results[0]["title"] == "Solar"
+
+
+def test_max_age_filters_old_documents(tmp_path):
+    index = make_index(tmp_path)
+    assert index.search("perovskite", max_age_s=3600)
+    assert index.search("perovskite", max_age_s=1e-9) == []
+
+
+def test_documents_without_content_are_skipped(tmp_path):
+    index = DocumentIndex(str(tmp_path / "index.sqlite"))
+    assert index.add_documents([{"url": "https://example.com/empty", "title": "Empty", "content": ""}], "web") == 0
+    assert index.stats()["documents"] == 0
@@ -0,0 +1,47 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import tools
+
+
+class FakeResponse:
+    content = b"{}"
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"results": [{"title": "Solar", "url": "https://example.com/solar", "content": "text", "score": 1}]}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    tools.search_cache.clear()
+    yield
+    tools.search_cache.clear()
+
+
+def test_concurrent_duplicate_searches_share_one_request(monkeypatch):
+    calls = []
+
+    def post(url, json, timeout):
+        calls.append(json["query"])
+        time.sleep(0.05)
+        return FakeResponse()
+    monkeypatch.setattr(tools.http, "post", post)
+
+    started = threading.Barrier(4)
+
+    def search(query):
+        started.wait()
+        return tools.search_web(query, max_results=3)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(search, ["solar", "solar", "solar", "wind"]))
+    assert sorted(calls) == ["solar", "wind"]
+    assert results[0] == results[1] == results[2]
+    assert tools.search_cache.stats()["hits"] == 2
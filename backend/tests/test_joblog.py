@@ -0,0 +1,42 @@
+from utils.joblog import JobLog, bind_job_log, current_log, log_stage, unbind_job_log
+
+
+def test_ring_buffer_keeps_newest():
+    log = JobLog(maxlen=3)
+    for i in range(5):
+        log.append(f"line {i}")
+    assert len(log) == 3
+    assert log.total == 5
+    assert log.first_index == 2
+    assert log.messages() == ["line 2", "line 3", "line 4"]
+
+
+def test_records_since_and_limit():
+    log = JobLog(maxlen=3)
+    for i in range(5):
+        log.append(f"line {i}")
+    assert log.messages(since=3) == ["line 3", "line 4"]
+    assert log.messages(since=0, limit=1) == ["line 2"]  # Older records were dropped
+    assert log.messages(since=5) == []
+    assert log.messages(since=99) == []
+
+
+def test_log_stage_tags_records():
+    log = JobLog()
+    with log_stage("gather"):
+        log.append("searching")
+    log.append("done")
+    log.append("explicit", level="warning", stage="report")
+    stages = [(r.stage, r.level) for r in log.records()]
+    assert stages == [("gather", "info"), (None, "info"), ("report", "warning")]
+    assert log.records()[0].to_dict()["message"] == "searching"
+
+
+def test_bind_job_log():
+    log = JobLog()
+    token = bind_job_log(log)
+    try:
+        current_log().append("bound")
+    finally:
+        unbind_job_log(token)
+    assert log.messages() == ["bound"]
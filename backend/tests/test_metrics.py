@@ -0,0 +1,56 @@
+import pytest
+
+from utils.metrics import JobMetrics, MetricsRegistry, annotate, bind_job_metrics, span, unbind_job_metrics
+
+
+def test_render_counters_and_histograms():
+    reg = MetricsRegistry()
+    reg.inc("requests_total", help="Requests", route="/a")
+    reg.inc("requests_total", 2, help="Requests", route="/a")
+    reg.observe("latency_seconds", 0.02, help="Latency", name="tavily")
+    reg.observe("latency_seconds", 3.0, help="Latency", name="tavily")
+
+    lines = reg.render_prometheus().splitlines()
+    assert "# HELP latency_seconds Latency" in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/a"} 3' in lines
+    assert 'latency_seconds_bucket{name="tavily",le="0.01"} 0' in lines
+    assert 'latency_seconds_bucket{name="tavily",le="0.025"} 1' in lines
+    assert 'latency_seconds_bucket{name="tavily",le="5.0"} 2' in lines
+    assert 'latency_seconds_bucket{name="tavily",le="+Inf"} 2' in lines
+    assert 'latency_seconds_sum{name="tavily"} 3.020000' in lines
+    assert 'latency_seconds_count{name="tavily"} 2' in lines
+
+
+def test_render_without_labels():
+    reg = MetricsRegistry()
+    reg.inc("jobs_total", help="Jobs")
+    reg.observe("wait_seconds", 0.5, help="Wait")
+    lines = reg.render_prometheus().splitlines()
+    assert "jobs_total 1" in lines
+    assert 'wait_seconds_bucket{le="0.5"} 1' in lines
+    assert "wait_seconds_sum 0.500000" in lines
+    assert "wait_seconds_count 1" in lines
+
+
+def test_span_records_to_job_metrics():
+    job = JobMetrics()
+    token = bind_job_metrics(job)
+    try:
+        with span("external", "tavily"):
+            annotate(bytes=100, retries=1)
+            annotate(bytes=50)
+        with pytest.raises(RuntimeError):
+            with span("llm", "planner"):
+                raise RuntimeError("boom")
+    finally:
+        unbind_job_metrics(token)
+
+    summary = job.summary()
+    tavily = summary["spans"]["external.tavily"]
+    assert tavily["count"] == 1
+    assert tavily["bytes"] == 150
+    assert tavily["retries"] == 1
+    assert summary["spans"]["llm.planner"]["errors"] == 1
+    assert summary["totals"]["external_calls"] == 2
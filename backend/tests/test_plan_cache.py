@@ -0,0 +1,91 @@
+import time
+
+from utils.plan_cache import PlanCache
+
+PLAN = ["What are React's strengths?", "What are Vue's strengths?", "Which suits large teams?"]
+
+
+def test_reordered_query_hits():
+    cache = PlanCache(threshold=0.85)
+    cache.add("React vs Vue for enterprise", "web", PLAN)
+    hit = cache.lookup("Vue vs React enterprise", "web")
+    assert hit is not None
+    assert hit["plan"] == PLAN
+    assert hit["query"] == "React vs Vue for enterprise"
+    assert hit["similarity"] >= 0.85
+
+
+def test_differing_term_is_substituted_in_plan():
+    cache = PlanCache(threshold=0.85)
+    cache.add("Effects of salt intake on blood pressure in older women", "web",
+              ["Salt intake and blood pressure in older women", "Hypertension risk for women over 65"])
+    hit = cache.lookup("Effects of salt intake on blood pressure in older men", "web")
+    assert hit["plan"] == ["Salt intake and blood pressure in older men", "Hypertension risk for men over 65"]
+    assert hit["substitutions"] == {"women": "men"}
+
+
+def test_differing_year_is_substituted_in_plan():
+    cache = PlanCache(threshold=0.85)
+    cache.add("Generative AI applications in 2023", "web",
+              ["Top generative AI applications 2023", "Enterprise adoption of generative AI"])
+    hit = cache.lookup("Generative AI applications in 2024", "web")
+    assert hit["plan"] == ["Top generative AI applications 2024", "Enterprise adoption of generative AI"]
+
+
+def test_differing_term_missing_from_plan_misses():
+    cache = PlanCache(threshold=0.8)
+    cache.add("Deploying microservices on AWS", "web",
+              ["Managed Kubernetes service comparison", "Serverless container pricing"])
+    assert cache.lookup("Deploying microservices on Azure", "web") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_extra_term_in_new_query_misses():
+    cache = PlanCache(threshold=0.7)
+    cache.add("Solar panel efficiency", "web", ["Solar panel efficiency records"])
+    assert cache.lookup("Solar panel efficiency in Germany", "web") is None
+
+
+def test_unrelated_query_misses():
+    cache = PlanCache(threshold=0.85)
+    cache.add("React vs Vue for enterprise", "web", PLAN)
+    assert cache.lookup("Health effects of coffee consumption", "web") is None
+    assert cache.stats() == {"size": 1, "hits": 0, "misses": 1}
+
+
+def test_search_mode_must_match():
+    cache = PlanCache(threshold=0.85)
+    cache.add("React vs Vue for enterprise", "web", PLAN)
+    assert cache.lookup("React vs Vue for enterprise", "academic") is None
+
+
+def test_returned_plan_is_a_copy():
+    cache = PlanCache(threshold=0.85)
+    cache.add("React vs Vue for enterprise", "web", PLAN)
+    cache.lookup("React vs Vue for enterprise", "web")["plan"].append("extra")
+    assert cache.lookup("React vs Vue for enterprise", "web")["plan"] == PLAN
+
+
+def test_oldest_entry_is_evicted():
+    cache = PlanCache(threshold=0.85, maxsize=2)
+    cache.add("solar panel efficiency", "web", ["a"])
+    cache.add("electric vehicle adoption", "web", ["b"])
+    cache.add("battery degradation", "web", ["c"])
+    assert cache.stats()["size"] == 2
+    assert cache.lookup("solar panel efficiency", "web") is None
+    assert cache.lookup("battery degradation", "web")["plan"] == ["c"]
+
+
+def test_entries_expire():
+    cache = PlanCache(threshold=0.85, ttl=0.01)
+    cache.add("solar panel efficiency", "web", ["a"])
+    time.sleep(0.02)
+    assert cache.lookup("solar panel efficiency", "web") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_threshold_above_one_disables():
+    cache = PlanCache(threshold=1.1)
+    cache.add("solar panel efficiency", "web", ["a"])
+    assert cache.lookup("solar panel efficiency", "web") is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,19 @@
+import agent
+
+
+def test_snippet_is_truncated():
+    assert agent._source_excerpt("a" * 600) == "a" * 500 + "..."
+
+
+def test_full_text_gets_its_own_budget(monkeypatch):
+    monkeypatch.setattr(agent, "ANALYSIS_FULLTEXT_CHARS", 50)
+    content = "Abstract: " + "a" * 600 + "\n[FULL TEXT] " + "x" * 1000
+    excerpt = agent._source_excerpt(content)
+    assert "\n[FULL TEXT] " + "x" * 50 + "..." in excerpt
+    assert excerpt.count("x") == 50
+    assert excerpt.startswith("Abstract: ")
+
+
+def test_zero_budget_drops_full_text(monkeypatch):
+    monkeypatch.setattr(agent, "ANALYSIS_FULLTEXT_CHARS", 0)
+    assert "[FULL TEXT]" not in agent._source_excerpt("abstract\n[FULL TEXT] body")
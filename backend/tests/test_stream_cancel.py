@@ -0,0 +1,65 @@
+import asyncio
+
+import main
+
+
+async def start_fake_job(job_id):
+    main.research_jobs[job_id] = {"status": "processing", "progress": ""}
+    task = asyncio.create_task(asyncio.sleep(60))
+    main.job_controls[job_id] = {"task": task, "cancel_event": asyncio.Event(), "subscribers": 0}
+    return task
+
+
+def cleanup(job_id):
+    controls = main.job_controls.pop(job_id)
+    controls["task"].cancel()
+    main.research_jobs.pop(job_id)
+
+
+def test_last_subscriber_leaving_cancels_after_grace(monkeypatch):
+    monkeypatch.setattr(main, "STREAM_CANCEL_GRACE_S", 0.05)
+
+    async def scenario():
+        task = await start_fake_job("job-a")
+        main.add_subscriber("job-a")
+        main.remove_subscriber("job-a")
+        await asyncio.sleep(0.01)
+        assert not task.cancelled() and not task.done()  # Still in the grace period
+        await asyncio.sleep(0.1)
+        assert task.cancelled()
+        assert main.job_controls["job-a"]["cancel_event"].is_set()
+        cleanup("job-a")
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_within_grace_keeps_job(monkeypatch):
+    monkeypatch.setattr(main, "STREAM_CANCEL_GRACE_S", 0.05)
+
+    async def scenario():
+        task = await start_fake_job("job-b")
+        main.add_subscriber("job-b")
+        main.remove_subscriber("job-b")
+        main.add_subscriber("job-b")  # Page refresh / EventSource reconnect
+        await asyncio.sleep(0.1)
+        assert not task.done()
+        assert "cancel_timer" not in main.job_controls["job-b"]
+        cleanup("job-b")
+
+    asyncio.run(scenario())
+
+
+def test_retry_is_not_cancelled_by_old_timer(monkeypatch):
+    monkeypatch.setattr(main, "STREAM_CANCEL_GRACE_S", 0.05)
+
+    async def scenario():
+        await start_fake_job("job-c")
+        main.add_subscriber("job-c")
+        main.remove_subscriber("job-c")
+        main.job_controls["job-c"]["task"].cancel()
+        retried = await start_fake_job("job-c")  # New controls for the retried run
+        await asyncio.sleep(0.1)
+        assert not retried.done()
+        cleanup("job-c")
+
+    asyncio.run(scenario())
@@ -0,0 +1,98 @@
+"""
+Process-wide caches shared by every job (API requests and batch runs)
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live
+
+    Tools run in worker threads, so every access goes through a lock.
+    Values are deep-copied on the way in and out because the agent
+    mutates search results in place (e.g. when attaching scraped content).
+    
+    claim(key) deduplicates in-flight work: while one caller fetches a
+    missing value, callers for the same key wait and then read it from the
+    cache instead of repeating the request.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 3600.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: dict[Hashable, list] = {}  # key -> [lock, number of claimants]
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a copy of the cached value, or None on a miss"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    @contextmanager
+    def claim(self, key: Hashable):
+        """
+        Hold the key while computing its value (get, fetch on a miss, set)
+        
+        Claims on the same key run one at a time; other keys are not blocked.
+        """
+        if not self.enabled:
+            yield
+            return
+        with self._lock:
+            entry = self._inflight.get(key)
+            if entry is None:
+                entry = self._inflight[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._inflight[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
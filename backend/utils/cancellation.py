@@ -0,0 +1,60 @@
+"""
+Cooperative cancellation for research jobs
+
+The API layer owns one threading.Event per job. run_agent binds it to the
+current context, so every node and every tool call (including the ones pushed
+to worker threads with asyncio.to_thread) can check it between blocking steps.
+"""
+
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+
+class JobCancelled(asyncio.CancelledError):
+    """
+    Raised inside the pipeline once the job's cancel event is set.
+
+    Subclasses CancelledError so the broad `except Exception` handlers in the
+    tools don't swallow it and asyncio treats it as a normal cancellation.
+    """
+
+
+_cancel_event: ContextVar[Optional[threading.Event]] = ContextVar("cancel_event", default=None)
+
+
+def bind_cancel_event(event: Optional[threading.Event]):
+    """Attach a cancel event to the current context. Returns a reset token."""
+    return _cancel_event.set(event)
+
+
+def unbind_cancel_event(token) -> None:
+    _cancel_event.reset(token)
+
+
+def is_cancelled() -> bool:
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+
+def check_cancelled() -> None:
+    """Raise JobCancelled if the current job has been cancelled."""
+    if is_cancelled():
+        raise JobCancelled("Job cancelled")
+
+
+def sleep(seconds: float) -> None:
+    """
+    time.sleep replacement that wakes up as soon as the job is cancelled
+
+    Args:
+        seconds: How long to wait
+    """
+    event = _cancel_event.get()
+    if event is None:
+        time.sleep(seconds)
+        return
+    if event.wait(seconds):
+        raise JobCancelled("Job cancelled")
@@ -0,0 +1,207 @@
+"""
+Persistent local document index (SQLite FTS5)
+
+Every page scraped and every abstract fetched is upserted here, keyed by URL.
+search_mode "local" / "hybrid" answer sub-questions from this index before
+going to Tavily or Semantic Scholar.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    source TEXT NOT NULL,
+    score REAL NOT NULL DEFAULT 0,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_fetched_at ON documents(fetched_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, content,
+    content='documents', content_rowid='id',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    INSERT INTO documents_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+"""
+
+# Keep the longer text on re-index (a deep scrape beats a search snippet),
+# but always refresh the timestamp so freshness reflects the last fetch.
+_UPSERT = """
+INSERT INTO documents (url, title, content, source, score, fetched_at)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(url) DO UPDATE SET
+    title = excluded.title,
+    content = CASE WHEN length(excluded.content) >= length(documents.content)
+                   THEN excluded.content ELSE documents.content END,
+    source = excluded.source,
+    score = excluded.score,
+    fetched_at = excluded.fetched_at
+"""
+
+_SEARCH = """
+SELECT d.id, d.title, d.url, d.content, d.source, d.fetched_at, bm25(documents_fts, 5.0, 1.0) AS rank
+FROM documents_fts
+JOIN documents d ON d.id = documents_fts.rowid
+WHERE documents_fts MATCH ? AND d.fetched_at >= ?
+ORDER BY rank
+LIMIT ?
+"""
+
+# Which of the candidate rows contain one query term (stemmed the same way as the index)
+_TERM_HITS = """
+SELECT rowid FROM documents_fts WHERE documents_fts MATCH ? AND rowid IN ({})
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Question words and fillers: matching on these says nothing about the topic
+_STOP_WORDS = frozenset("""
+about above after again against all also and any are because been before being below between both but
+can could did does doing down during each few for from further had has have having her here hers him his
+how into its itself just more most much not now off once only other our ours out over own same she
+should some such than that the their theirs them then there these they this those through too under
+until very was were what when where which while who whom why will with would you your yours
+""".split())
+
+
+def _query_terms(query: str) -> list[str]:
+    """Distinct, lowercased content words of a query"""
+    terms = [t for t in _TOKEN_RE.findall(query.lower()) if len(t) > 2 and t not in _STOP_WORDS]
+    return list(dict.fromkeys(terms))
+
+
+def _match_expression(terms: list[str]) -> Optional[str]:
+    """Turn query terms into an FTS5 OR-query of quoted terms (no syntax errors on user input)"""
+    if not terms:
+        return None
+    return " OR ".join(f'"{t}"' for t in terms)
+
+
+class DocumentIndex:
+    """
+    Full-text index over gathered documents
+
+    Connections are opened per call: tools run in worker threads and SQLite
+    connections can't be shared across threads. WAL mode lets readers and the
+    single writer proceed concurrently.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+        return conn
+
+    def add_documents(self, documents: list[dict], source: str) -> int:
+        """
+        Upsert documents by URL
+
+        Args:
+            documents: Search results with title, url, content, score
+            source: Where they came from ('web', 'academic', ...)
+
+        Returns:
+            Number of documents written
+        """
+        now = time.time()
+        rows = [
+            (d['url'], d.get('title', ''), d.get('content', ''), source, float(d.get('score') or 0), now)
+            for d in documents
+            if d.get('url') and d.get('content')
+        ]
+        if not rows:
+            return 0
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(_UPSERT, rows)
+        finally:
+            conn.close()
+        return len(rows)
+
+    def search(
+        self,
+        query: str,
+        max_results: int = 5,
+        max_age_s: Optional[float] = None,
+        min_term_share: float = 0.0,
+    ) -> list[dict]:
+        """
+        BM25-ranked search over title and content
+
+        Args:
+            query: Free-text query
+            max_results: Max number of documents to return
+            max_age_s: Ignore documents fetched longer ago than this
+            min_term_share: Drop documents containing less than this share (0-1)
+                of the query's content words, so one shared word isn't a hit
+
+        Returns:
+            List of results in the same shape as search_web, plus term_share
+        """
+        terms = _query_terms(query)
+        expression = _match_expression(terms)
+        if expression is None:
+            return []
+        oldest = time.time() - max_age_s if max_age_s else 0.0
+        # Over-fetch when filtering: a partial match can outrank a fuller one under BM25
+        limit = max_results * 4 if min_term_share > 0 else max_results
+        conn = self._connect()
+        try:
+            rows = conn.execute(_SEARCH, (expression, oldest, limit)).fetchall()
+            matched = dict.fromkeys((row[0] for row in rows), 0)
+            if matched:
+                term_hits = _TERM_HITS.format(",".join("?" * len(matched)))
+                for term in terms:
+                    for (rowid,) in conn.execute(term_hits, (f'"{term}"', *matched)):
+                        matched[rowid] += 1
+        finally:
+            conn.close()
+        results = []
+        for rowid, title, url, content, source, fetched_at, rank in rows:
+            share = matched[rowid] / len(terms)
+            if share < min_term_share:
+                continue
+            results.append({
+                'title': title,
+                'url': url,
+                'content': content,
+                'score': -rank,  # bm25() is lower-is-better
+                'source': source,
+                'fetched_at': fetched_at,
+                'term_share': round(share, 2),
+            })
+        return results[:max_results]
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        try:
+            count, newest = conn.execute("SELECT count(*), max(fetched_at) FROM documents").fetchone()
+        finally:
+            conn.close()
+        return {"documents": count, "newest_fetched_at": newest}
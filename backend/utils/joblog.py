@@ -0,0 +1,107 @@
+"""
+Bounded per-job log
+
+Each job owns one JobLog. run_agent binds it to the context, nodes fetch it
+with current_log() and tools receive it through their `logs` argument (it has
+the same .append() as the list it replaces), so log lines are written once
+into a shared ring buffer instead of being copied through the graph state.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import islice
+from typing import Optional
+
+from config import LOG_BUFFER_SIZE
+
+
+class LogRecord:
+    """One log line"""
+
+    __slots__ = ("ts", "level", "stage", "message")
+
+    def __init__(self, ts: float, level: str, stage: Optional[str], message: str):
+        self.ts = ts
+        self.level = level
+        self.stage = stage
+        self.message = message
+
+    def to_dict(self) -> dict:
+        return {"ts": self.ts, "level": self.level, "stage": self.stage, "message": self.message}
+
+
+_current_stage: ContextVar[Optional[str]] = ContextVar("log_stage", default=None)
+
+
+class JobLog:
+    """
+    Append-only ring buffer of LogRecords
+
+    Only the newest `maxlen` records are kept. Records are numbered from the
+    start of the job, so a client can ask for "everything after N" and get a
+    cheap slice even after old records have been dropped.
+    """
+
+    def __init__(self, maxlen: int = LOG_BUFFER_SIZE):
+        self._records: deque = deque(maxlen=maxlen)
+        self._lock = threading.Lock()  # Tools append from worker threads
+        self.total = 0  # Records ever appended
+
+    def append(self, message: str, level: str = "info", stage: Optional[str] = None) -> None:
+        record = LogRecord(time.time(), level, stage or _current_stage.get(), message)
+        with self._lock:
+            self._records.append(record)
+            self.total += 1
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def first_index(self) -> int:
+        """Sequence number of the oldest record still in the buffer"""
+        return self.total - len(self._records)
+
+    def records(self, since: int = 0, limit: Optional[int] = None) -> list[LogRecord]:
+        """Records with sequence number >= since (oldest first)"""
+        with self._lock:
+            size = len(self._records)
+            start = min(size, max(0, since - (self.total - size)))
+            end = size if limit is None else min(size, start + limit)
+            return list(islice(self._records, start, end))
+
+    def messages(self, since: int = 0, limit: Optional[int] = None) -> list[str]:
+        return [r.message for r in self.records(since, limit)]
+
+
+_current_log: ContextVar[Optional[JobLog]] = ContextVar("job_log", default=None)
+
+
+def bind_job_log(log: Optional[JobLog]):
+    """Attach a JobLog to the current context. Returns a reset token."""
+    return _current_log.set(log)
+
+
+def unbind_job_log(token) -> None:
+    _current_log.reset(token)
+
+
+def current_log() -> JobLog:
+    """The job's log, or a throwaway one when running outside a job"""
+    log = _current_log.get()
+    if log is None:
+        log = JobLog()
+        _current_log.set(log)
+    return log
+
+
+@contextmanager
+def log_stage(stage: str):
+    """Tag records appended inside the block (including from tools) with `stage`"""
+    token = _current_stage.set(stage)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
@@ -0,0 +1,260 @@
+"""
+Spans, histograms and per-job metrics
+
+Every graph node and every external call runs inside a span. When a span
+closes it is recorded in up to three places:
+- the process-wide registry (histograms + counters, rendered for /api/metrics)
+- the current job's JobMetrics, if one is bound (attached to the status payload)
+- the current job's JobTrace, if tracing is on (see utils/tracing.py)
+
+Spans nest through a ContextVar, so a tool running in a worker thread (via
+asyncio.to_thread, which copies the context) still reports to its job.
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from utils.tracing import current_trace, current_track
+
+# Seconds. Covers sub-ms cache hits up to multi-minute academic backoff.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Span:
+    """One timed unit of work (a node, a tool call, an LLM call)"""
+
+    __slots__ = ("kind", "name", "start", "duration", "bytes", "tokens_in", "tokens_out",
+                 "retries", "cache_hit", "error", "attrs")
+
+    def __init__(self, kind: str, name: str, attrs: dict):
+        self.kind = kind
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.bytes = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.retries = 0
+        self.cache_hit = False
+        self.error = False
+        self.attrs = attrs
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(DURATION_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _labels(labels: tuple) -> str:
+    return ",".join(f'{k}="{v}"' for k, v in labels)
+
+
+def _series(name: str, labels: tuple) -> str:
+    """`name{labels}`, or the bare name when there are no labels"""
+    label_str = _labels(labels)
+    return f"{name}{{{label_str}}}" if label_str else name
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms, keyed by metric name and labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple, Histogram] = {}
+        self._counters: dict[tuple, float] = {}
+        self._help: dict[str, tuple[str, str]] = {}
+
+    def _describe(self, metric: str, kind: str, text: str) -> None:
+        self._help.setdefault(metric, (kind, text))
+
+    def inc(self, metric: str, value: float = 1.0, help: str = "", **labels) -> None:
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            self._describe(metric, "counter", help)
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, metric: str, value: float, help: str = "", **labels) -> None:
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            self._describe(metric, "histogram", help)
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    def record_span(self, span: Span) -> None:
+        labels = {"kind": span.kind, "name": span.name}
+        self.observe("insightflow_span_duration_seconds", span.duration,
+                     "Duration of nodes and external calls", **labels)
+        if span.bytes:
+            self.inc("insightflow_span_bytes_total", span.bytes, "Bytes received from external calls", **labels)
+        if span.tokens_in:
+            self.inc("insightflow_llm_tokens_total", span.tokens_in, "LLM tokens", direction="in", **labels)
+        if span.tokens_out:
+            self.inc("insightflow_llm_tokens_total", span.tokens_out, "LLM tokens", direction="out", **labels)
+        if span.retries:
+            self.inc("insightflow_span_retries_total", span.retries, "Retries (e.g. after HTTP 429)", **labels)
+        if span.cache_hit:
+            self.inc("insightflow_cache_hits_total", 1, "Calls answered from a cache", **labels)
+        if span.error:
+            self.inc("insightflow_span_errors_total", 1, "Spans that raised", **labels)
+
+    def render_prometheus(self) -> str:
+        """Text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            for name, (kind, text) in sorted(self._help.items()):
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "histogram":
+                    for (metric, labels), hist in sorted(self._histograms.items()):
+                        if metric != name:
+                            continue
+                        label_str = _labels(labels)
+                        prefix = f"{label_str}," if label_str else ""
+                        for bound, count in zip(DURATION_BUCKETS, hist.counts):
+                            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {count}')
+                        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {hist.count}')
+                        lines.append(f"{_series(name + '_sum', labels)} {hist.sum:.6f}")
+                        lines.append(f"{_series(name + '_count', labels)} {hist.count}")
+                else:
+                    for (metric, labels), value in sorted(self._counters.items()):
+                        if metric == name:
+                            lines.append(f"{_series(name, labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+class JobMetrics:
+    """Per-job aggregate of span records, keyed by 'kind.name'"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}
+
+    def record_span(self, span: Span) -> None:
+        key = f"{span.kind}.{span.name}"
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {
+                    "count": 0, "total_s": 0.0, "max_s": 0.0, "bytes": 0, "tokens_in": 0,
+                    "tokens_out": 0, "retries": 0, "cache_hits": 0, "errors": 0,
+                }
+            stats["count"] += 1
+            stats["total_s"] += span.duration
+            stats["max_s"] = max(stats["max_s"], span.duration)
+            stats["bytes"] += span.bytes
+            stats["tokens_in"] += span.tokens_in
+            stats["tokens_out"] += span.tokens_out
+            stats["retries"] += span.retries
+            stats["cache_hits"] += int(span.cache_hit)
+            stats["errors"] += int(span.error)
+
+    def summary(self) -> dict:
+        with self._lock:
+            spans = {
+                key: {**stats, "total_s": round(stats["total_s"], 4), "max_s": round(stats["max_s"], 4)}
+                for key, stats in self._stats.items()
+            }
+        totals = {
+            field: sum(s[field] for s in spans.values())
+            for field in ("bytes", "tokens_in", "tokens_out", "retries", "cache_hits", "errors")
+        }
+        totals["external_calls"] = sum(s["count"] for k, s in spans.items() if k.startswith(("external.", "llm.")))
+        return {"spans": spans, "totals": totals}
+
+
+registry = MetricsRegistry()
+
+_job_metrics: ContextVar[Optional[JobMetrics]] = ContextVar("job_metrics", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def bind_job_metrics(metrics: Optional[JobMetrics]):
+    """Attach a JobMetrics to the current context. Returns a reset token."""
+    return _job_metrics.set(metrics)
+
+
+def unbind_job_metrics(token) -> None:
+    _job_metrics.reset(token)
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs):
+    """
+    Time a block of work and record it on exit
+
+    Args:
+        kind: 'node', 'external', 'llm', 'local', 'wait' or 'cpu'
+        name: Node or upstream name (low cardinality, used as a metric label)
+        attrs: Free-form details kept on the span (not used as labels)
+    """
+    record = Span(kind, name, attrs)
+    trace = current_trace()
+    if trace is not None:
+        track = current_track()
+        if kind == "cpu":
+            trace.enter_cpu()
+    token = _current_span.set(record)
+    try:
+        yield record
+    except BaseException:
+        record.error = True
+        raise
+    finally:
+        _current_span.reset(token)
+        record.duration = time.perf_counter() - record.start
+        registry.record_span(record)
+        job = _job_metrics.get()
+        if job is not None:
+            job.record_span(record)
+        if trace is not None:
+            if kind == "cpu":
+                trace.exit_cpu()
+            trace.record(record, track)
+
+
+def annotate(**fields) -> None:
+    """
+    Set fields (bytes, tokens_in, retries, cache_hit, ...) on the innermost open span
+
+    Numeric fields accumulate, so a function can annotate bytes per chunk.
+    """
+    record = _current_span.get()
+    if record is None:
+        return
+    for field, value in fields.items():
+        if field in ("bytes", "tokens_in", "tokens_out", "retries"):
+            setattr(record, field, getattr(record, field) + value)
+        elif field in ("cache_hit", "error"):
+            setattr(record, field, value)
+        else:
+            record.attrs[field] = value
+
+
+def instrumented(kind: str, name: str):
+    """Decorator: run a sync function inside span(kind, name)"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(kind, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,54 @@
+"""
+Page-by-page PDF text extraction
+
+The PDF is read from a file on disk through a read-only memory map, so pypdf
+pages the document in as it parses instead of the whole file being held in
+a bytes object. Extraction stops once the page or character budget is hit.
+"""
+
+import mmap
+
+from utils.cancellation import check_cancelled
+
+
+def extract_pdf_text(path: str, max_pages: int, max_chars: int) -> dict:
+    """
+    Extract text from a PDF file
+    
+    Args:
+        path: PDF file on disk
+        max_pages: Stop after this many pages
+        max_chars: Stop once this much text has been collected
+        
+    Returns:
+        Dict with text, pages (parsed), page_count (in the document), truncated
+    """
+    from pypdf import PdfReader  # Imported on first use to keep startup light
+    
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        reader = PdfReader(mm)
+        if reader.is_encrypted:
+            reader.decrypt("")  # Most "protected" papers use an empty user password
+        
+        page_count = len(reader.pages)
+        parts = []
+        chars = 0
+        pages = 0
+        for page in reader.pages:
+            if pages >= max_pages or chars >= max_chars:
+                break
+            check_cancelled()
+            text = (page.extract_text() or "").strip()
+            pages += 1
+            if text:
+                parts.append(text)
+                chars += len(text)
+        del reader  # Drop page objects before the map is closed
+    
+    text = "\n\n".join(parts)
+    return {
+        "text": text[:max_chars],
+        "pages": pages,
+        "page_count": page_count,
+        "truncated": pages < page_count or len(text) > max_chars
+    }
@@ -0,0 +1,187 @@
+"""
+Similarity cache for research plans
+
+Near-duplicate queries ("React vs Vue for enterprise" / "Vue vs React
+enterprise") get the same plan, so the planner LLM call can be skipped.
+Queries are embedded as hashed TF-IDF vectors over character n-grams taken
+inside word boundaries, which makes matching insensitive to word order.
+
+Similarity alone can't tell "older women" from "older men" or 2023 from 2024,
+so a near neighbour is only reused if it covers every content word of the
+new query. When the two queries differ in the same number of words and each
+word being swapped out appears in the cached plan, the plan is adapted by
+substituting the new words; otherwise the lookup is a miss.
+"""
+
+import re
+import threading
+import time
+import zlib
+from typing import Optional
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOP_WORDS = {
+    "a", "about", "an", "and", "are", "as", "at", "be", "between", "by", "compare", "difference",
+    "do", "does", "for", "from", "how", "in", "is", "it", "of", "on", "or", "the", "to", "vs",
+    "versus", "what", "which", "with",
+}
+
+
+def _content_words(text: str) -> dict[str, str]:
+    """
+    Content words of a query, in order
+    
+    Returns:
+        Dict mapping a normalized key (lowercase, plural 's' stripped) to the word as written
+    """
+    words = {}
+    for token in _TOKEN_RE.findall(text):
+        key = token.lower()
+        if key in _STOP_WORDS or (len(key) < 2 and not key.isdigit()):
+            continue
+        if len(key) > 3 and key.endswith("s") and not key.endswith("ss"):
+            key = key[:-1]
+        words.setdefault(key, token)
+    return words
+
+
+def _adapt_plan(query: str, cached_query: str, plan: list[str]) -> Optional[tuple[list[str], dict]]:
+    """
+    Make a cached plan fit `query`
+    
+    Returns:
+        (plan, {cached word: new word}) or None if the plan can't be reused
+    """
+    new_words = _content_words(query)
+    old_words = _content_words(cached_query)
+    added = [word for key, word in new_words.items() if key not in old_words]
+    if not added:
+        return list(plan), {}
+    removed = [word for key, word in old_words.items() if key not in new_words]
+    if len(removed) != len(added):
+        return None
+    
+    patterns = [re.compile(rf"\b{re.escape(old)}\b", re.IGNORECASE) for old in removed]
+    # Every swapped-out word must show up in the plan, or the plan is about it implicitly
+    if not all(any(p.search(step) for step in plan) for p in patterns):
+        return None
+    adapted = list(plan)
+    for pattern, word in zip(patterns, added):
+        adapted = [pattern.sub(word, step) for step in adapted]
+    return adapted, dict(zip(removed, added))
+
+
+class PlanCache:
+    """
+    In-memory nearest-neighbour cache of (query, search_mode) -> plan
+
+    All stored vectors live in one dense float32 matrix, so a lookup is a
+    single matrix-vector product regardless of cache size.
+    """
+
+    def __init__(self, threshold: float = 0.85, maxsize: int = 512, ttl: float = 86400.0,
+                 dim: int = 4096, ngram_range: tuple[int, int] = (3, 5)):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.hits = 0
+        self.misses = 0
+        self._tf = np.zeros((0, dim), dtype=np.float32)
+        self._entries: list[dict] = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.threshold <= 1.0
+
+    def _vectorize(self, text: str) -> np.ndarray:
+        """Sublinear term-frequency vector of hashed char n-grams"""
+        counts = np.zeros(self.dim, dtype=np.float32)
+        lo, hi = self.ngram_range
+        for token in _TOKEN_RE.findall(text.lower()):
+            if token in _STOP_WORDS:
+                continue
+            padded = f" {token} "
+            for n in range(lo, hi + 1):
+                for i in range(max(1, len(padded) - n + 1)):
+                    gram = padded[i:i + n]
+                    counts[zlib.crc32(gram.encode("utf-8")) % self.dim] += 1.0
+        nonzero = counts > 0
+        counts[nonzero] = 1.0 + np.log(counts[nonzero])
+        return counts
+
+    def _evict_expired(self) -> None:
+        cutoff = time.time() - self.ttl
+        keep = [i for i, e in enumerate(self._entries) if e["created_at"] >= cutoff]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._tf = self._tf[keep]
+
+    def lookup(self, query: str, search_mode: str) -> Optional[dict]:
+        """
+        Find the most similar cached query planned in the same mode
+
+        Returns:
+            {"query", "plan", "similarity", "substitutions"} if above the
+            threshold and the plan covers (or could be adapted to) the query, else None
+        """
+        if not self.enabled:
+            return None
+        q_tf = self._vectorize(query)
+        with self._lock:
+            self._evict_expired()
+            mask = np.array([e["search_mode"] == search_mode for e in self._entries], dtype=bool)
+            if not mask.any() or not q_tf.any():
+                self.misses += 1
+                return None
+
+            # IDF over the cached corpus (smoothed, as in sklearn)
+            n_docs = self._tf.shape[0]
+            df = np.count_nonzero(self._tf, axis=0)
+            idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+
+            matrix = self._tf[mask] * idf
+            q_vec = q_tf * idf
+            norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(q_vec)
+            sims = (matrix @ q_vec) / np.where(norms == 0, 1.0, norms)
+
+            candidates = [e for e, m in zip(self._entries, mask) if m]
+            for best in np.argsort(-sims):
+                similarity = float(sims[best])
+                if similarity < self.threshold:
+                    break
+                entry = candidates[best]
+                adapted = _adapt_plan(query, entry["query"], entry["plan"])
+                if adapted is None:
+                    continue
+                self.hits += 1
+                return {"query": entry["query"], "plan": adapted[0], "similarity": similarity,
+                        "substitutions": adapted[1]}
+            self.misses += 1
+            return None
+
+    def add(self, query: str, search_mode: str, plan: list[str]) -> None:
+        if not self.enabled:
+            return
+        vec = self._vectorize(query)
+        with self._lock:
+            self._evict_expired()
+            self._entries.append({
+                "query": query,
+                "search_mode": search_mode,
+                "plan": list(plan),
+                "created_at": time.time(),
+            })
+            self._tf = np.vstack([self._tf, vec[None, :]])
+            if len(self._entries) > self.maxsize:
+                overflow = len(self._entries) - self.maxsize
+                self._entries = self._entries[overflow:]
+                self._tf = self._tf[overflow:]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
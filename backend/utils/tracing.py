@@ -0,0 +1,207 @@
+"""
+Per-job timeline in Chrome trace-event format
+
+When a JobTrace is bound to a run, every span closed by utils.metrics.span()
+is also written here as a complete ("X") event on its own track: one track
+per asyncio task (graph nodes, LLM calls) and one per worker thread (tools).
+Load the JSON from /api/trace/{job_id} in chrome://tracing or ui.perfetto.dev.
+
+With profiling on, a sampler thread also records the Python stack of every
+thread currently inside a 'cpu' span (HTML extraction, PDF parsing), emitted
+as trace "samples" so the hot frames show up under those spans.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+PID = os.getpid()
+
+
+def current_track() -> str:
+    """Name of the timeline row for the caller: its asyncio task, else its thread"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return f"task {task.get_name()}"
+    return f"thread {threading.current_thread().name}"
+
+
+class JobTrace:
+    """
+    Collects trace events for one job
+
+    Args:
+        profile: Sample stacks of threads inside 'cpu' spans
+        sample_interval_ms: Sampler period
+        max_events: Stop recording past this many events (keeps memory bounded)
+    """
+
+    def __init__(self, profile: bool = False, sample_interval_ms: float = 5.0, max_events: int = 50000):
+        self.epoch = time.perf_counter()
+        self.started_at = time.time()
+        self.profile = profile
+        self.sample_interval = sample_interval_ms / 1000.0
+        self.max_events = max_events
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._events: list[dict] = []
+        self._tracks: dict[str, int] = {}
+        # Profiler state
+        self._cpu_threads: dict[int, int] = {}  # thread ident -> open cpu spans
+        self._stack_frames: dict[str, dict] = {}
+        self._frame_ids: dict[tuple, str] = {}
+        self._samples: list[dict] = []
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def _us(self, t: float) -> float:
+        return round((t - self.epoch) * 1e6, 1)
+
+    def _tid(self, track: str) -> int:
+        tid = self._tracks.get(track)
+        if tid is None:
+            tid = self._tracks[track] = len(self._tracks) + 1
+        return tid
+
+    def record(self, span, track: str) -> None:
+        """Add a closed span (utils.metrics.Span) as a complete event"""
+        args = dict(span.attrs)
+        for field in ("bytes", "tokens_in", "tokens_out", "retries"):
+            value = getattr(span, field)
+            if value:
+                args[field] = value
+        if span.cache_hit:
+            args["cache_hit"] = True
+        if span.error:
+            args["error"] = True
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._events.append({
+                "name": span.name,
+                "cat": span.kind,
+                "ph": "X",
+                "ts": self._us(span.start),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": PID,
+                "tid": self._tid(track),
+                "args": args,
+            })
+
+    # --- Sampling profiler ---
+
+    def enter_cpu(self) -> None:
+        if not self.profile:
+            return
+        ident = threading.get_ident()
+        with self._lock:
+            self._cpu_threads[ident] = self._cpu_threads.get(ident, 0) + 1
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_loop, name="trace-sampler", daemon=True)
+                self._sampler.start()
+
+    def exit_cpu(self) -> None:
+        if not self.profile:
+            return
+        ident = threading.get_ident()
+        with self._lock:
+            remaining = self._cpu_threads.get(ident, 0) - 1
+            if remaining > 0:
+                self._cpu_threads[ident] = remaining
+            else:
+                self._cpu_threads.pop(ident, None)
+
+    def _frame_id(self, stack: tuple) -> Optional[str]:
+        """Intern a (outermost..innermost) stack into the stackFrames tree"""
+        parent = None
+        for depth in range(1, len(stack) + 1):
+            key = stack[:depth]
+            frame_id = self._frame_ids.get(key)
+            if frame_id is None:
+                frame_id = self._frame_ids[key] = str(len(self._frame_ids) + 1)
+                entry = {"name": stack[depth - 1], "category": "python"}
+                if parent is not None:
+                    entry["parent"] = parent
+                self._stack_frames[frame_id] = entry
+            parent = frame_id
+        return parent
+
+    def _sample_loop(self) -> None:
+        threads = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.sample_interval):
+            with self._lock:
+                idents = list(self._cpu_threads)
+            if not idents:
+                continue
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                if ident not in threads:
+                    threads = {t.ident: t.name for t in threading.enumerate()}
+                with self._lock:
+                    if len(self._samples) >= self.max_events:
+                        self.dropped += 1
+                        continue
+                    self._samples.append({
+                        "cat": "cpu",
+                        "name": "sample",
+                        "ts": self._us(now),
+                        "pid": PID,
+                        "tid": self._tid(f"thread {threads.get(ident, ident)}"),
+                        "sf": self._frame_id(tuple(stack)),
+                        "weight": 1,
+                    })
+
+    def finish(self) -> None:
+        """Stop the sampler (the trace stays readable)"""
+        self._stop.set()
+
+    def to_chrome(self) -> dict:
+        """Trace-event JSON object (traceEvents + stackFrames + samples)"""
+        with self._lock:
+            metadata = [
+                {"name": "process_name", "ph": "M", "pid": PID, "tid": 0, "args": {"name": "insightflow"}}
+            ] + [
+                {"name": "thread_name", "ph": "M", "pid": PID, "tid": tid, "args": {"name": track}}
+                for track, tid in self._tracks.items()
+            ]
+            return {
+                "traceEvents": metadata + list(self._events),
+                "stackFrames": dict(self._stack_frames),
+                "samples": list(self._samples),
+                "displayTimeUnit": "ms",
+                "otherData": {"started_at": self.started_at, "dropped_events": self.dropped},
+            }
+
+
+_job_trace: ContextVar[Optional[JobTrace]] = ContextVar("job_trace", default=None)
+
+
+def bind_job_trace(trace: Optional[JobTrace]):
+    """Attach a JobTrace to the current context. Returns a reset token."""
+    return _job_trace.set(trace)
+
+
+def unbind_job_trace(token) -> None:
+    _job_trace.reset(token)
+
+
+def current_trace() -> Optional[JobTrace]:
+    return _job_trace.get()
@@ -2,7 +2,7 @@
 
 import { useEffect, useState } from 'react'
 import { useParams } from 'next/navigation'
-import { getStatus, type StatusResponse } from '@/lib/api'
+import { streamStatus, cancelResearch, type StatusResponse } from '@/lib/api'
 import ProgressTracker from '@/components/ProgressTracker'
 import ReportView from '@/components/ReportView'
 
@@ -14,34 +14,27 @@ export default function ResultsPage() {
   const [error, setError] = useState('')
 
   useEffect(() => {
-    let interval: NodeJS.Timeout
-
-    const checkStatus = async () => {
-      try {
-        const data = await getStatus(jobId)
-        setStatus(data)
-
-        // Stop polling if completed or error
-        if (data.status === 'completed' || data.status === 'error') {
-          if (interval) clearInterval(interval)
-        }
-      } catch (err) {
-        setError('Failed to fetch status. Is the backend running?')
-        console.error(err)
-        if (interval) clearInterval(interval)
-      }
-    }
-
-    // Initial check
-    checkStatus()
-
-    // Poll every 2 seconds
-    interval = setInterval(checkStatus, 2000)
+    // Stream instead of polling: when this page goes away the stream closes
+    // and the backend cancels the job unless it is reopened shortly (refresh)
+    const source = streamStatus(
+      jobId,
+      (data) => {
+        // Events only carry new log lines, so append them
+        setStatus((prev) => ({ ...data, logs: [...(prev?.logs || []), ...(data.logs || [])] }))
+      },
+      () => setError('Failed to fetch status. Is the backend running?')
+    )
+
+    return () => source.close()
+  }, [jobId])
 
-    return () => {
-      if (interval) clearInterval(interval)
+  const handleCancel = async () => {
+    try {
+      await cancelResearch(jobId)
+    } catch (err) {
+      console.error(err)
     }
-  }, [jobId])
+  }
 
   return (
     <main className="min-h-screen bg-linear-to-br from-blue-50 via-indigo-50 to-purple-50">
@@ -87,6 +80,31 @@ export default function ResultsPage() {
               progress={status.progress}
               logs={status.logs || []}
             />
+            <div className="text-center mt-4">
+              <button
+                onClick={handleCancel}
+                className="text-sm text-gray-500 hover:text-red-600 transition"
+              >
+                Cancel research
+              </button>
+            </div>
+          </div>
+        )}
+
+        {/* Cancelled State */}
+        {status && status.status === 'cancelled' && (
+          <div className="max-w-2xl mx-auto">
+            <div className="bg-gray-50 border border-gray-200 rounded-xl p-6">
+              <h3 className="font-bold text-gray-800 mb-2">Research Cancelled</h3>
+              <p className="text-gray-600">{status.progress || 'The job was stopped before it finished.'}</p>
+
+              <a
+                href="/"
+                className="inline-block mt-4 bg-blue-600 text-white py-2 px-6 rounded-lg hover:bg-blue-700 transition"
+              >
+                New Research
+              </a>
+            </div>
           </div>
         )}
 
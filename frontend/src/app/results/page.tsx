@@ -21,8 +21,8 @@ export default function ResultsPage() {
         const data = await getStatus(jobId)
         setStatus(data)
 
-        // Stop polling if completed or error
-        if (data.status === 'completed' || data.status === 'error') {
+        // Stop polling if completed, error or cancelled
+        if (data.status === 'completed' || data.status === 'error' || data.status === 'cancelled') {
           if (interval) clearInterval(interval)
         }
       } catch (err) {
@@ -8,7 +8,7 @@ interface ReportViewProps {
   sources?: Array<{
     title: string
     url: string
-    content: string
+    content_length?: number
   }>
   insights?: string[]
   query: string
@@ -15,13 +15,16 @@ export interface StatusResponse {
     sources: Array<{
       title: string;
       url: string;
-      content: string;
+      index: number;
+      content_length: number;
+      content_url: string;
     }>;
     current_step?: string;
     insights: string[];
   };
   error?: string;
   logs?: string[];
+  logs_total?: number;
   current_step?: string;
 }
 
@@ -56,6 +59,57 @@ export async function getStatus(jobId: string): Promise<StatusResponse> {
   return response.json();
 }
 
+// Server-Sent Events for a job. Each event carries the full status but only the
+// log lines added since the previous event. Closing the last stream of a
+// running job cancels it on the server, unless a new stream opens within the
+// grace period (STREAM_CANCEL_GRACE_S).
+export function streamStatus(
+  jobId: string,
+  onStatus: (status: StatusResponse) => void,
+  onError: () => void
+): EventSource {
+  const source = new EventSource(`${API_URL}/api/stream/${jobId}`);
+
+  source.onmessage = (event) => {
+    const data: StatusResponse = JSON.parse(event.data);
+    onStatus(data);
+    if (data.status !== 'processing') {
+      source.close();
+    }
+  };
+
+  source.onerror = () => {
+    // CLOSED means the browser gave up reconnecting
+    if (source.readyState === EventSource.CLOSED) {
+      onError();
+    }
+  };
+
+  return source;
+}
+
+export async function cancelResearch(jobId: string) {
+  const response = await fetch(`${API_URL}/api/research/${jobId}`, {
+    method: 'DELETE',
+  });
+
+  if (!response.ok) {
+    throw new Error('Failed to cancel research');
+  }
+
+  return response.json();
+}
+
+export async function getSourceContent(jobId: string, index: number) {
+  const response = await fetch(`${API_URL}/api/result/${jobId}/sources/${index}`);
+
+  if (!response.ok) {
+    throw new Error('Failed to get source');
+  }
+
+  return response.json();
+}
+
 export async function checkHealth() {
   const response = await fetch(`${API_URL}/api/health`);
   return response.json();